@@ -0,0 +1,348 @@
+"""
+Unified benchmark runner for every counter strategy in this repository.
+
+Runs the existing harnesses - the task1 web client against Flask server
+backends, the task2 PostgreSQL workers and the task3 Hazelcast tests -
+over a matrix of thread counts and iteration sizes, writes the results as
+JSON/CSV and compares them with a stored baseline.
+
+Usage:
+    python run_benchmarks.py --suites postgres --threads 1,5,10 --iterations 1000 --json results.json
+    python run_benchmarks.py --suites hazelcast --baseline baseline.json
+    python run_benchmarks.py --suites web --web-backends inmemory,file,wal --threads 1,2,5
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TASK1_CLIENT = os.path.join(ROOT, "task1", "client")
+TASK1_SERVER = os.path.join(ROOT, "task1", "server")
+TASK2 = os.path.join(ROOT, "task2")
+TASK3 = os.path.join(ROOT, "task3")
+
+SUITES = ("web", "postgres", "hazelcast")
+
+POSTGRES_STRATEGIES = {
+    "lost-update": "lost_update_worker",
+    "serializable": "serializable_worker",
+    "inplace": "inplace_update_worker",
+    "row-locking": "row_locking_worker",
+    "optimistic": "optimistic_locking_worker",
+}
+
+HAZELCAST_STRATEGIES = {
+    "map-no-lock": "test_no_locking",
+    "map-pessimistic": "test_pessimistic_locking",
+    "map-cas": "test_optimistic_locking",
+    "iatomiclong": "test_iatomic_long",
+    "map-entry-processor": "test_entry_processor",
+}
+
+WEB_BACKENDS = ("inmemory", "inmemory-striped", "file", "mmap", "wal", "postgres", "postgres-sharded", "hazelcast", "hazelcast-crdt")
+
+CSV_FIELDS = ["suite", "strategy", "threads", "iterations", "correct", "elapsed_s", "throughput",
+              "p50_ms", "p90_ms", "p99_ms", "p99.9_ms", "max_ms", "retries_per_commit"]
+
+# Strategies that retry on conflicts and accept a RetryPolicy
+RETRYING_STRATEGIES = ("serializable", "optimistic", "map-cas")
+
+
+def _import_from(directory, module):
+    """Import a module from one of the task directories (each is its own project)"""
+    if directory not in sys.path:
+        sys.path.insert(0, directory)
+    return __import__(module)
+
+
+def make_record(suite, strategy, threads, iterations, correct, elapsed, latency_us, retries=None):
+    """Normalize one harness result into a flat, serializable record"""
+    ops = threads * iterations
+    record = {
+        "suite": suite,
+        "strategy": strategy,
+        "threads": threads,
+        "iterations": iterations,
+        "correct": bool(correct),
+        "elapsed_s": round(elapsed, 4),
+        "throughput": round(ops / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    for key in ("p50", "p90", "p99", "p99.9", "max"):
+        record[f"{key}_ms"] = round(latency_us[key] / 1000, 3)
+    record["retries_per_commit"] = round(retries["retries_per_commit"], 3) if retries else None
+    return record
+
+
+# ============================================================
+# Suites
+# ============================================================
+
+def run_postgres_suite(args, strategies, matrix):
+    impl = _import_from(TASK2, "counter_implementations")
+    for tier in args.pg_durability:
+        db_config = impl.DatabaseConfig(
+            host=os.getenv("POSTGRES_HOST", "localhost"),
+            port=int(os.getenv("POSTGRES_PORT", "5432")),
+            database=os.getenv("POSTGRES_DB", "counter_db"),
+            user=os.getenv("POSTGRES_USER", "postgres"),
+            password=os.getenv("POSTGRES_PASSWORD", "postgres"),
+            durability=tier,
+            durability_scope=args.pg_durability_scope
+        )
+        for strategy in strategies:
+            worker = getattr(impl, POSTGRES_STRATEGIES[strategy])
+            # Relaxed tiers get their own strategy name so baselines compare like with like
+            name = strategy if tier == "strict" else f"{strategy}@{tier}"
+            for threads, iterations in matrix:
+                policy = impl.RetryPolicy(args.backoff) if strategy in RETRYING_STRATEGIES else None
+                r = impl.run_test(name, worker, db_config, threads, iterations, retry_policy=policy,
+                                  prepared=args.pg_statements == "prepared")
+                yield make_record("postgres", name, threads, iterations,
+                                  r["success"], r["elapsed"], r["latency_us"], r["retries"])
+
+
+def run_hazelcast_suite(args, strategies, matrix):
+    tests = _import_from(TASK3, "counter_test")
+    client = tests.create_hazelcast_client()
+    try:
+        for strategy in strategies:
+            test = getattr(tests, HAZELCAST_STRATEGIES[strategy])
+            for threads, iterations in matrix:
+                if strategy in RETRYING_STRATEGIES:
+                    policy = tests.RetryPolicy(args.backoff)
+                    correct, elapsed, latency = test(client, threads, iterations, retry_policy=policy)
+                    retries = policy.stats()
+                else:
+                    correct, elapsed, latency = test(client, threads, iterations)
+                    retries = None
+                yield make_record("hazelcast", strategy, threads, iterations,
+                                  correct, elapsed, latency.summary(), retries)
+    finally:
+        client.shutdown()
+
+
+def _wait_for_server(url, timeout=30.0):
+    import requests
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{url}/count", timeout=1).raise_for_status()
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not become ready within {timeout}s")
+
+
+def _start_server(backend, port, data_dir):
+    """Start task1/server/server.py for one backend with its files in data_dir"""
+    cmd = [
+        sys.executable, os.path.join(TASK1_SERVER, "server.py"),
+        "--backend", backend, "--port", str(port),
+        "--file", os.path.join(data_dir, "counter.txt"),
+        "--mmap-file", os.path.join(data_dir, "counter.bin"),
+        "--wal-dir", os.path.join(data_dir, "wal"),
+    ]
+    return subprocess.Popen(cmd, cwd=TASK1_SERVER, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+
+
+def run_web_suite(args, strategies, matrix):
+    client = _import_from(TASK1_CLIENT, "client")
+
+    def run_matrix(url, strategy):
+        for threads, iterations in matrix:
+            client.reset_counter(url)
+            r = client.run_experiment(url, threads, iterations)
+            yield make_record("web", strategy, threads, iterations,
+                              r["total_count"] == r["expected_count"], r["elapsed"], r["latency_us"])
+
+    if args.web_url:
+        # Benchmark a server that is already running (e.g. in docker-compose)
+        yield from run_matrix(args.web_url, args.web_label)
+        return
+
+    for backend in strategies:
+        with tempfile.TemporaryDirectory(prefix=f"bench-{backend}-") as data_dir:
+            server = _start_server(backend, args.web_port, data_dir)
+            url = f"http://127.0.0.1:{args.web_port}"
+            try:
+                _wait_for_server(url)
+                yield from run_matrix(url, backend)
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+
+SUITE_RUNNERS = {
+    "web": (run_web_suite, WEB_BACKENDS),
+    "postgres": (run_postgres_suite, tuple(POSTGRES_STRATEGIES)),
+    "hazelcast": (run_hazelcast_suite, tuple(HAZELCAST_STRATEGIES)),
+}
+
+
+# ============================================================
+# Output and baseline comparison
+# ============================================================
+
+def _key(record):
+    return record["suite"], record["strategy"], record["threads"], record["iterations"]
+
+
+def compare_with_baseline(results, baseline, throughput_threshold, p99_threshold):
+    """
+    Compare results with a baseline run.
+
+    Returns:
+        List of (record, baseline_record, reasons) for every regression
+    """
+    previous = {_key(r): r for r in baseline}
+    regressions = []
+
+    print("\n" + "="*80)
+    print("BASELINE COMPARISON")
+    print("="*80)
+    print(f"{'Suite/Strategy':<32} {'Thr x Iter':<12} {'Throughput':<14} {'p99':<14} {'Status':<10}")
+    print("-"*80)
+
+    for r in results:
+        base = previous.get(_key(r))
+        name = f"{r['suite']}/{r['strategy']}"
+        size = f"{r['threads']}x{r['iterations']}"
+        if base is None:
+            print(f"{name:<32} {size:<12} {'-':<14} {'-':<14} {'new':<10}")
+            continue
+
+        tput_change = (r["throughput"] - base["throughput"]) / base["throughput"] if base["throughput"] else 0.0
+        p99_change = (r["p99_ms"] - base["p99_ms"]) / base["p99_ms"] if base["p99_ms"] else 0.0
+
+        reasons = []
+        if tput_change < -throughput_threshold:
+            reasons.append(f"throughput {tput_change:+.1%}")
+        if p99_change > p99_threshold:
+            reasons.append(f"p99 {p99_change:+.1%}")
+        if base["correct"] and not r["correct"]:
+            reasons.append("no longer correct")
+
+        status = "✗ REGRESSED" if reasons else "✓ ok"
+        print(f"{name:<32} {size:<12} {tput_change:<+14.1%} {p99_change:<+14.1%} {status:<10}")
+        if reasons:
+            regressions.append((r, base, reasons))
+
+    print("="*80)
+    for r, _, reasons in regressions:
+        print(f"✗ {r['suite']}/{r['strategy']} {r['threads']}x{r['iterations']}: {', '.join(reasons)}")
+    return regressions
+
+
+def write_json(path, results, args):
+    with open(path, "w") as f:
+        json.dump({
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "threads": args.threads,
+            "iterations": args.iterations,
+            "results": results,
+        }, f, indent=2)
+
+
+def write_csv(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def load_baseline(path):
+    with open(path) as f:
+        data = json.load(f)
+    # Accept a bare list of records as well as a file written by --json
+    return data["results"] if isinstance(data, dict) else data
+
+
+def print_summary(results):
+    print("\n" + "="*80)
+    print("BENCHMARK SUMMARY")
+    print("="*80)
+    print(f"{'Suite/Strategy':<32} {'Thr x Iter':<12} {'Correct':<8} {'Throughput':<14} {'p50 (ms)':<10} {'p99 (ms)':<10}")
+    print("-"*80)
+    for r in results:
+        print(f"{r['suite'] + '/' + r['strategy']:<32} {str(r['threads']) + 'x' + str(r['iterations']):<12} "
+              f"{'✓' if r['correct'] else '✗':<8} {r['throughput']:<14.2f} {r['p50_ms']:<10.2f} {r['p99_ms']:<10.2f}")
+
+
+def parse_int_list(value):
+    return [int(v) for v in value.split(",") if v]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run counter benchmarks across strategies, threads and sizes")
+    parser.add_argument("--suites", default="postgres,hazelcast",
+                        help=f"Comma-separated suites to run: {','.join(SUITES)}")
+    parser.add_argument("--strategies", default=None,
+                        help="Comma-separated strategy names to keep (default: all in the selected suites)")
+    parser.add_argument("--threads", type=parse_int_list, default=[1, 2, 5, 10], help="Thread/client counts, e.g. 1,2,5,10")
+    parser.add_argument("--iterations", type=parse_int_list, default=[1000], help="Iterations per thread, e.g. 1000,10000")
+    parser.add_argument("--backoff", choices=("none", "exponential", "adaptive"), default="exponential",
+                        help="Retry policy for conflicting strategies (serializable, optimistic, map-cas)")
+    parser.add_argument("--pg-statements", choices=("prepared", "text"), default="prepared",
+                        help="postgres suite: PREPARE/EXECUTE or plain SQL text per call")
+    parser.add_argument("--pg-durability", type=lambda v: [t for t in v.split(",") if t], default=["strict"],
+                        help="postgres suite: comma-separated synchronous_commit tiers (strict,local,async)")
+    parser.add_argument("--pg-durability-scope", choices=("session", "transaction"), default="session",
+                        help="postgres suite: apply the tier per connection or per transaction (SET LOCAL)")
+    parser.add_argument("--web-backends", default="inmemory,file",
+                        help="web suite: server.py backends to start locally, one at a time")
+    parser.add_argument("--web-port", type=int, default=18080, help="web suite: port for locally started servers")
+    parser.add_argument("--web-url", default=None, help="web suite: benchmark this running server instead")
+    parser.add_argument("--web-label", default="external", help="web suite: strategy name used with --web-url")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    parser.add_argument("--csv", default=None, help="Write results to this CSV file")
+    parser.add_argument("--baseline", default=None, help="JSON results of a previous run to compare against")
+    parser.add_argument("--throughput-threshold", type=float, default=0.10,
+                        help="Flag a regression when throughput drops by more than this fraction")
+    parser.add_argument("--p99-threshold", type=float, default=0.25,
+                        help="Flag a regression when p99 latency grows by more than this fraction")
+    args = parser.parse_args()
+
+    suites = [s for s in args.suites.split(",") if s]
+    for suite in suites:
+        if suite not in SUITES:
+            parser.error(f"Unknown suite '{suite}' (choose from {', '.join(SUITES)})")
+    wanted = set(args.strategies.split(",")) if args.strategies else None
+    matrix = [(t, i) for t in args.threads for i in args.iterations]
+
+    results = []
+    for suite in suites:
+        runner, available = SUITE_RUNNERS[suite]
+        if suite == "web":
+            available = [b for b in args.web_backends.split(",") if b]
+            unknown = set(available) - set(WEB_BACKENDS)
+            if unknown:
+                parser.error(f"Unknown web backend(s): {', '.join(sorted(unknown))}")
+        strategies = [s for s in available if wanted is None or s in wanted]
+        if not strategies and not (suite == "web" and args.web_url):
+            continue
+        print(f"\n{'#'*80}\n# Suite: {suite} - {', '.join(strategies) or args.web_label}\n{'#'*80}")
+        results.extend(runner(args, strategies, matrix))
+
+    print_summary(results)
+    if args.json:
+        write_json(args.json, results, args)
+        print(f"\nResults written to {args.json}")
+    if args.csv:
+        write_csv(args.csv, results)
+        print(f"Results written to {args.csv}")
+
+    if args.baseline:
+        regressions = compare_with_baseline(results, load_baseline(args.baseline),
+                                            args.throughput_threshold, args.p99_threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,111 +1,173 @@
-import time
-import argparse
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-
-def worker(url, n_requests):
-    s = requests.Session()
-    for i in range(n_requests):
-        r = s.post(f"{url}/inc")
-        r.raise_for_status()
-    return True
-
-
-def run_experiment(url, clients, requests_per_client):
-    """Run a single experiment with specified number of clients"""
-    print(f"\n{'='*60}")
-    print(f"Running experiment: {clients} client(s), {requests_per_client} requests each")
-    print(f"{'='*60}")
-
-    start = time.perf_counter()
-    with ThreadPoolExecutor(max_workers=clients) as ex:
-        futures = [ex.submit(worker, url, requests_per_client) for _ in range(clients)]
-        for f in as_completed(futures):
-            f.result()
-    end = time.perf_counter()
-    elapsed = end - start
-
-    # Get final count
-    r = requests.get(f"{url}/count")
-    r.raise_for_status()
-    total_count = r.json().get("value", None)
-
-    expected_count = clients * requests_per_client
-    print(f"\nResults:")
-    print(f"  Total count: {total_count}")
-    print(f"  Expected count: {expected_count}")
-    print(f"  Elapsed time: {elapsed:.4f} seconds")
-
-    if elapsed > 0 and total_count is not None:
-        throughput = total_count / elapsed
-        print(f"  Throughput: {throughput:.2f} requests/second")
-
-    if total_count != expected_count:
-        print(f"  WARNING: Count mismatch! Lost {expected_count - total_count} updates")
-
-    return {
-        "clients": clients,
-        "requests_per_client": requests_per_client,
-        "total_count": total_count,
-        "expected_count": expected_count,
-        "elapsed": elapsed,
-        "throughput": total_count / elapsed if elapsed > 0 else 0
-    }
-
-
-def reset_counter(url):
-    """Reset the counter to 0"""
-    try:
-        r = requests.post(f"{url}/reset")
-        r.raise_for_status()
-        print("Counter reset successfully")
-    except Exception as e:
-        print(f"Warning: Could not reset counter: {e}")
-
-
-def main():
-    parser = argparse.ArgumentParser(description="Web counter client for load testing")
-    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Server URL")
-    parser.add_argument("--clients", type=int, help="Number of concurrent clients")
-    parser.add_argument("--requests-per-client", type=int, default=10000, help="Requests per client")
-    parser.add_argument("--run-all", action="store_true", help="Run all experiments (1, 2, 5 clients)")
-    args = parser.parse_args()
-
-    if args.run_all:
-        # Run all experiments
-        experiments = [1, 2, 5]
-        results = []
-
-        print(f"\n{'#'*60}")
-        print(f"# Running all experiments with {args.requests_per_client} requests per client")
-        print(f"# Server: {args.url}")
-        print(f"{'#'*60}")
-
-        for num_clients in experiments:
-            # Reset counter before each experiment
-            reset_counter(args.url)
-            time.sleep(0.5)  # Small delay to ensure reset completes
-
-            result = run_experiment(args.url, num_clients, args.requests_per_client)
-            results.append(result)
-
-        # Summary
-        print(f"\n{'='*60}")
-        print(f"SUMMARY OF ALL EXPERIMENTS")
-        print(f"{'='*60}")
-        print(f"{'Clients':<10} {'Total Req':<12} {'Time (s)':<12} {'Throughput (req/s)':<20}")
-        print(f"{'-'*60}")
-        for r in results:
-            print(f"{r['clients']:<5} {r['total_count']:<12} {r['elapsed']:<12.4f} {r['throughput']:<20.2f}")
-
-    elif args.clients:
-        # Run single experiment
-        run_experiment(args.url, args.clients, args.requests_per_client)
-    else:
-        parser.print_help()
-
-
-if __name__ == "__main__":
-    main()
-
+import time
+import argparse
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from loadgen import run_async_load
+from histogram import LatencyHistogram
+
+
+def worker(url, n_requests, by=1):
+    s = requests.Session()
+    # by > 1 applies several increments per round trip via /inc?by=N
+    params = {"by": by} if by > 1 else None
+    # Per-thread histogram: no shared state on the hot path, merged at the end
+    hist = LatencyHistogram()
+    for i in range(n_requests):
+        t0 = time.perf_counter_ns()
+        r = s.post(f"{url}/inc", params=params)
+        r.raise_for_status()
+        hist.record((time.perf_counter_ns() - t0) // 1000)
+    return hist
+
+
+def print_latency(hist, co_interval_us=None, open_loop=False):
+    """Print raw and coordinated-omission corrected percentiles."""
+    print(hist.report("Latency"))
+    if open_loop:
+        # Open-loop latency is already measured from the scheduled send time
+        return None
+    # A closed-loop client stops sending while a request stalls; assume it
+    # would otherwise have sent one request per expected interval
+    interval = co_interval_us or hist.percentile(50)
+    corrected = hist.corrected(interval)
+    print(corrected.report(f"Latency, CO-corrected (interval {interval / 1000:.2f} ms)"))
+    return corrected
+
+
+def run_experiment(url, clients, requests_per_client, by=1, mode="threads", pipeline=1, rate=None,
+                   co_interval_ms=None):
+    """Run a single experiment with specified number of clients"""
+    print(f"\n{'='*60}")
+    print(f"Running experiment: {clients} client(s), {requests_per_client} requests each"
+          + (f", +{by} per request" if by > 1 else ""))
+    if mode == "async":
+        load = f"open loop at {rate:g} req/s" if rate else "closed loop"
+        print(f"Async load generator: {load}, pipeline depth {pipeline}")
+    print(f"{'='*60}")
+
+    load_info = None
+    if mode == "async":
+        # One keep-alive connection per simulated client, all on one event loop
+        load_info = run_async_load(url, clients, clients * requests_per_client, by, pipeline, rate)
+        elapsed = load_info["elapsed"]
+        hist = load_info["histogram"]
+    else:
+        hist = LatencyHistogram()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as ex:
+            futures = [ex.submit(worker, url, requests_per_client, by) for _ in range(clients)]
+            for f in as_completed(futures):
+                hist.merge(f.result())
+        end = time.perf_counter()
+        elapsed = end - start
+
+    # Get final count
+    r = requests.get(f"{url}/count")
+    r.raise_for_status()
+    total_count = r.json().get("value", None)
+
+    expected_count = clients * requests_per_client * by
+    print(f"\nResults:")
+    print(f"  Total count: {total_count}")
+    print(f"  Expected count: {expected_count}")
+    print(f"  Elapsed time: {elapsed:.4f} seconds")
+
+    if elapsed > 0 and total_count is not None:
+        throughput = total_count / elapsed
+        if by > 1:
+            print(f"  Throughput: {throughput:.2f} increments/second "
+                  f"({clients * requests_per_client / elapsed:.2f} requests/second)")
+        else:
+            print(f"  Throughput: {throughput:.2f} requests/second")
+
+    if load_info is not None:
+        print(f"  Reconnects: {load_info['reconnects']}")
+        if load_info["dropped"]:
+            print(f"  Dropped in flight (not re-sent): {load_info['dropped']}")
+    co_interval_us = int(co_interval_ms * 1000) if co_interval_ms else None
+    corrected = print_latency(hist, co_interval_us, open_loop=mode == "async" and bool(rate))
+
+    if total_count != expected_count:
+        print(f"  WARNING: Count mismatch! Lost {expected_count - total_count} updates")
+
+    return {
+        "clients": clients,
+        "requests_per_client": requests_per_client,
+        "total_count": total_count,
+        "expected_count": expected_count,
+        "elapsed": elapsed,
+        "throughput": total_count / elapsed if elapsed > 0 else 0,
+        "latency_us": hist.summary(),
+        "latency_corrected_us": corrected.summary() if corrected is not None else None,
+    }
+
+
+def reset_counter(url):
+    """Reset the counter to 0 and return the server's new reset epoch"""
+    try:
+        r = requests.post(f"{url}/reset")
+        r.raise_for_status()
+        epoch = r.json().get("epoch")
+        print(f"Counter reset successfully (epoch {epoch})")
+        return epoch
+    except Exception as e:
+        print(f"Warning: Could not reset counter: {e}")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Web counter client for load testing")
+    parser.add_argument("--url", default="http://127.0.0.1:8080", help="Server URL")
+    parser.add_argument("--clients", type=int, help="Number of concurrent clients")
+    parser.add_argument("--requests-per-client", type=int, default=10000, help="Requests per client")
+    parser.add_argument("--run-all", action="store_true", help="Run all experiments (1, 2, 5 clients)")
+    parser.add_argument("--by", type=int, default=1, help="Increments applied per request (/inc?by=N)")
+    parser.add_argument("--mode", choices=["threads", "async"], default="threads",
+                        help="threads: one blocking client per thread; async: keep-alive connections on one event loop")
+    parser.add_argument("--pipeline", type=int, default=1, help="Async mode: pipelined requests per connection")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Async mode: open-loop arrival rate in requests/second (default: closed loop)")
+    parser.add_argument("--co-interval-ms", type=float, default=None,
+                        help="Expected request interval for coordinated-omission correction (default: raw p50)")
+    args = parser.parse_args()
+
+    if args.run_all:
+        # Run all experiments
+        experiments = [1, 2, 5]
+        results = []
+
+        print(f"\n{'#'*60}")
+        print(f"# Running all experiments with {args.requests_per_client} requests per client")
+        print(f"# Server: {args.url}")
+        print(f"{'#'*60}")
+
+        for num_clients in experiments:
+            # Reset counter before each experiment
+            # Reset is atomic on the server, no settling delay needed
+            reset_counter(args.url)
+
+            result = run_experiment(args.url, num_clients, args.requests_per_client, args.by,
+                                    args.mode, args.pipeline, args.rate, args.co_interval_ms)
+            results.append(result)
+
+        # Summary
+        print(f"\n{'='*60}")
+        print(f"SUMMARY OF ALL EXPERIMENTS")
+        print(f"{'='*60}")
+        print(f"{'Clients':<10} {'Total Req':<12} {'Time (s)':<12} {'Throughput (req/s)':<20} {'p99 (ms)':<10}")
+        print(f"{'-'*70}")
+        for r in results:
+            print(f"{r['clients']:<5} {r['total_count']:<12} {r['elapsed']:<12.4f} {r['throughput']:<20.2f} "
+                  f"{r['latency_us']['p99'] / 1000:<10.2f}")
+
+    elif args.clients:
+        # Run single experiment
+        run_experiment(args.url, args.clients, args.requests_per_client, args.by,
+                       args.mode, args.pipeline, args.rate, args.co_interval_ms)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
+
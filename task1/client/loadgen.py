@@ -0,0 +1,241 @@
+"""
+Asyncio HTTP/1.1 load generator for the web counter.
+
+One process drives thousands of concurrent keep-alive connections (no
+OS thread per simulated client), optionally pipelining several requests
+per connection. Two load models:
+
+    closed loop - every connection sends its next request(s) as soon as
+                  the previous response arrives (throughput = server capacity)
+    open loop   - requests are issued at a fixed arrival rate regardless of
+                  how fast the server answers (latency under a given load)
+
+Pipelining needs a server that keeps connections open (server_async.py,
+server_fast.py). Against a server that closes after each response (the
+Flask server.py) every connection falls back to one request at a time.
+Requests that were in flight when a connection closed are counted as
+dropped and never re-sent: the server may already have applied them.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from histogram import LatencyHistogram
+
+try:
+    import uvloop
+except ImportError:  # optional speedup
+    uvloop = None
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client connection with pipelining."""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+        self.connects = 0
+        self.dropped = 0
+        # None until the first response tells whether the server keeps the connection open
+        self.persistent = None
+
+    async def connect(self):
+        self.close()
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.connects += 1
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None and not self.writer.is_closing()
+
+    async def read_response(self):
+        """
+        Read one response.
+
+        Returns:
+            (status, keep_alive) - status is None if the server closed
+            the connection before answering
+        """
+        status_line = await self.reader.readline()
+        if not status_line:
+            return None, False
+        version, status = status_line.split(b" ", 2)[:2]
+        keep_alive = version == b"HTTP/1.1"
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.partition(b":")
+            key = key.strip().lower()
+            if key == b"content-length":
+                length = int(value)
+            elif key == b"connection":
+                token = value.strip().lower()
+                if token == b"close":
+                    keep_alive = False
+                elif token == b"keep-alive":
+                    keep_alive = True
+        if length:
+            await self.reader.readexactly(length)
+        return int(status), keep_alive
+
+    async def exchange(self, payload: bytes, depth: int, hist: LatencyHistogram = None,
+                       started=None):
+        """
+        Write up to `depth` pipelined requests and read their responses.
+
+        Only one request is written until the server has kept a connection
+        open. If the connection closes with requests still unanswered, they
+        are counted in `dropped` and not retried.
+
+        Args:
+            hist: Histogram receiving one latency (us) per response
+            started: perf_counter_ns() start time per request (open loop passes
+                     the scheduled times); defaults to the actual send time
+
+        Returns:
+            Number of requests written (answered or dropped)
+        """
+        fresh = not self.connected
+        if fresh:
+            await self.connect()
+        if not self.persistent:
+            depth = 1
+        sent = time.perf_counter_ns()
+        self.writer.write(payload * depth)
+        await self.writer.drain()
+
+        ok = 0
+        for _ in range(depth):
+            try:
+                status, keep_alive = await self.read_response()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                status, keep_alive = None, False
+            if status is None:
+                break
+            if status // 100 != 2:
+                raise RuntimeError(f"HTTP {status}")
+            if hist is not None:
+                t0 = started[ok] if started else sent
+                hist.record((time.perf_counter_ns() - t0) // 1000)
+            ok += 1
+            self.persistent = keep_alive
+            if not keep_alive:
+                break
+        if ok < depth or not keep_alive:
+            self.close()
+        if ok == 0 and fresh:
+            raise ConnectionError(f"{self.host}:{self.port} closed the connection without a response")
+        self.dropped += depth - ok
+        return depth
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def build_request(url: str, by: int = 1) -> bytes:
+    parts = urlsplit(url)
+    path = "/inc" + (f"?by={by}" if by > 1 else "")
+    return (
+        f"POST {path} HTTP/1.1\r\n"
+        f"Host: {parts.netloc}\r\n"
+        f"Content-Length: 0\r\n"
+        f"\r\n"
+    ).encode("ascii")
+
+
+async def _closed_loop(conn: HttpConnection, payload: bytes, total: int, pipeline: int,
+                       hist: LatencyHistogram):
+    """Send `total` requests back-to-back, `pipeline` at a time."""
+    remaining = total
+    while remaining > 0:
+        remaining -= await conn.exchange(payload, min(pipeline, remaining), hist)
+
+
+async def _open_loop(conn: HttpConnection, payload: bytes, queue: asyncio.Queue,
+                     pipeline: int, hist: LatencyHistogram):
+    """Serve scheduled arrivals from the shared queue until it is drained."""
+    while True:
+        scheduled = [await queue.get()]
+        if scheduled[0] is None:
+            return
+        # Pipeline any other arrivals that are already due
+        while len(scheduled) < pipeline and not queue.empty():
+            nxt = queue.get_nowait()
+            if nxt is None:
+                queue.put_nowait(None)
+                break
+            scheduled.append(nxt)
+
+        # Latency counted from the scheduled send time, not the actual one,
+        # so a stalled server cannot hide queueing delay (coordinated omission)
+        done = 0
+        while done < len(scheduled):
+            done += await conn.exchange(payload, len(scheduled) - done, hist, scheduled[done:])
+
+
+async def _schedule(queue: asyncio.Queue, total: int, rate: float, consumers: int):
+    start = time.perf_counter_ns()
+    for i in range(total):
+        due = start + int(i * 1e9 / rate)
+        delay = (due - time.perf_counter_ns()) / 1e9
+        if delay > 0:
+            await asyncio.sleep(delay)
+        queue.put_nowait(due)
+    for _ in range(consumers):
+        queue.put_nowait(None)
+
+
+async def run_load(url: str, concurrency: int, total: int, by: int = 1,
+                   pipeline: int = 1, rate: float = None) -> dict:
+    """
+    Drive `total` /inc requests over `concurrency` connections.
+
+    Args:
+        rate: Open-loop arrival rate in requests/second; None = closed loop
+
+    Returns:
+        Dict with elapsed, reconnects, dropped (in flight when a connection
+        closed, outcome unknown) and ``histogram`` (per-request latency)
+    """
+    parts = urlsplit(url)
+    payload = build_request(url, by)
+    conns = [HttpConnection(parts.hostname, parts.port or 80) for _ in range(concurrency)]
+    hist = LatencyHistogram()
+
+    start = time.perf_counter()
+    if rate:
+        queue = asyncio.Queue()
+        await asyncio.gather(
+            _schedule(queue, total, rate, concurrency),
+            *(_open_loop(c, payload, queue, pipeline, hist) for c in conns),
+        )
+    else:
+        share, extra = divmod(total, concurrency)
+        await asyncio.gather(*(
+            _closed_loop(c, payload, share + (1 if i < extra else 0), pipeline, hist)
+            for i, c in enumerate(conns)
+        ))
+    elapsed = time.perf_counter() - start
+
+    for c in conns:
+        c.close()
+    return {
+        "elapsed": elapsed,
+        "reconnects": sum(max(c.connects - 1, 0) for c in conns),
+        "dropped": sum(c.dropped for c in conns),
+        "histogram": hist,
+    }
+
+
+def run_async_load(url: str, concurrency: int, total: int, by: int = 1,
+                   pipeline: int = 1, rate: float = None) -> dict:
+    """Synchronous entry point used by client.py."""
+    if uvloop is not None:
+        uvloop.install()
+    return asyncio.run(run_load(url, concurrency, total, by, pipeline, rate))
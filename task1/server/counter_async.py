@@ -0,0 +1,264 @@
+"""
+Async counter backends for server_async.py.
+
+Same increment()/get()/reset() contract as the sync backends, but as
+coroutines, so one event loop can keep thousands of requests in flight
+while they wait on PostgreSQL, Hazelcast or disk I/O.
+"""
+import asyncio
+import os
+from typing import Optional
+
+
+class AsyncInMemoryCounter:
+    """In-memory counter. The event loop is single-threaded, so no lock is needed."""
+
+    def __init__(self):
+        self.value = 0
+        self.epoch = 0
+
+    async def increment(self) -> int:
+        return await self.increment_by(1)
+
+    async def increment_by(self, n: int) -> int:
+        self.value += n
+        return self.value
+
+    async def get(self) -> int:
+        return self.value
+
+    async def reset(self) -> int:
+        self.value = 0
+        self.epoch += 1
+        return self.epoch
+
+    async def close(self):
+        pass
+
+
+class AsyncFileCounter:
+    """
+    File-based counter with aiofiles-style I/O.
+    Blocking file operations run in the default thread pool so they never
+    stall the event loop; an asyncio.Lock keeps read-modify-write atomic.
+    """
+
+    def __init__(self, file_path: str = "/data/counter.txt"):
+        self.file_path = file_path
+        self._lock = asyncio.Lock()
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Initialize file with 0 if it doesn't exist
+        if not os.path.exists(self.file_path):
+            self._write(0)
+
+    def _read_fields(self) -> tuple:
+        """(value, epoch); same file format as FileCounter"""
+        with open(self.file_path, 'r') as f:
+            fields = f.read().split()
+        return (int(fields[0]) if fields else 0), (int(fields[1]) if len(fields) > 1 else 0)
+
+    def _read(self) -> int:
+        return self._read_fields()[0]
+
+    def _write(self, value: int, epoch: int = 0):
+        with open(self.file_path, 'w') as f:
+            f.write(f"{value} {epoch}" if epoch else str(value))
+
+    def _add(self, amount: int) -> int:
+        value, epoch = self._read_fields()
+        value += amount
+        self._write(value, epoch)
+        return value
+
+    def _reset(self) -> int:
+        epoch = self._read_fields()[1] + 1
+        self._write(0, epoch)
+        return epoch
+
+    async def increment(self) -> int:
+        return await self.increment_by(1)
+
+    async def increment_by(self, n: int) -> int:
+        async with self._lock:
+            # One thread-pool hop for the whole read-modify-write
+            return await asyncio.to_thread(self._add, n)
+
+    async def get(self) -> int:
+        async with self._lock:
+            return await asyncio.to_thread(self._read)
+
+    async def reset(self) -> int:
+        async with self._lock:
+            return await asyncio.to_thread(self._reset)
+
+    async def close(self):
+        pass
+
+
+class AsyncPostgresCounter:
+    """PostgreSQL counter on an asyncpg connection pool (atomic in-place update)."""
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    @classmethod
+    async def create(cls, db_config: Optional[dict] = None,
+                     pool_min: Optional[int] = None, pool_max: Optional[int] = None,
+                     durability: Optional[str] = None):
+        """
+        Open the pool and initialize the table.
+
+        Args:
+            db_config: Database configuration dict with keys:
+                      host, port, database, user, password
+            pool_min: Connections kept open in the pool (default: POSTGRES_POOL_MIN or 1)
+            pool_max: Upper bound on pooled connections (default: POSTGRES_POOL_MAX or 10)
+            durability: strict | local | async, applied to every pooled session
+                        (default: POSTGRES_DURABILITY or strict)
+        """
+        import asyncpg
+        from pg_pool import DURABILITY_LEVELS
+
+        if db_config is None:
+            db_config = {
+                'host': os.getenv('POSTGRES_HOST', 'localhost'),
+                'port': int(os.getenv('POSTGRES_PORT', 5432)),
+                'database': os.getenv('POSTGRES_DB', 'counter_db'),
+                'user': os.getenv('POSTGRES_USER', 'postgres'),
+                'password': os.getenv('POSTGRES_PASSWORD', 'postgres')
+            }
+        if pool_min is None:
+            pool_min = int(os.getenv('POSTGRES_POOL_MIN', 1))
+        if pool_max is None:
+            pool_max = int(os.getenv('POSTGRES_POOL_MAX', 10))
+
+        if durability is None:
+            durability = os.getenv('POSTGRES_DURABILITY', 'strict')
+        if durability not in DURABILITY_LEVELS:
+            raise ValueError(f"Unknown durability: {durability}")
+
+        pool = await asyncpg.create_pool(
+            min_size=pool_min, max_size=pool_max,
+            server_settings={'synchronous_commit': DURABILITY_LEVELS[durability]},
+            **db_config
+        )
+        async with pool.acquire() as conn:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS web_counter (
+                    counter_id INTEGER PRIMARY KEY,
+                    counter_value BIGINT NOT NULL DEFAULT 0
+                )
+            """)
+            await conn.execute(
+                "ALTER TABLE web_counter ADD COLUMN IF NOT EXISTS epoch BIGINT NOT NULL DEFAULT 0"
+            )
+            await conn.execute("""
+                INSERT INTO web_counter (counter_id, counter_value)
+                VALUES (1, 0)
+                ON CONFLICT (counter_id) DO NOTHING
+            """)
+        return cls(pool)
+
+    async def increment(self) -> int:
+        return await self.increment_by(1)
+
+    async def increment_by(self, n: int) -> int:
+        # Single statement outside an explicit transaction - autocommitted
+        async with self.pool.acquire() as conn:
+            value = await conn.fetchval("""
+                UPDATE web_counter
+                SET counter_value = counter_value + $1
+                WHERE counter_id = 1
+                RETURNING counter_value
+            """, n)
+            return value or 0
+
+    async def get(self) -> int:
+        async with self.pool.acquire() as conn:
+            value = await conn.fetchval(
+                "SELECT counter_value FROM web_counter WHERE counter_id = 1"
+            )
+            return value or 0
+
+    async def reset(self) -> int:
+        async with self.pool.acquire() as conn:
+            epoch = await conn.fetchval(
+                "UPDATE web_counter SET counter_value = 0, epoch = epoch + 1 "
+                "WHERE counter_id = 1 RETURNING epoch"
+            )
+            return epoch or 0
+
+    def stats(self) -> dict:
+        return {'pool': {
+            'min_size': self.pool.get_min_size(),
+            'max_size': self.pool.get_max_size(),
+            'size': self.pool.get_size(),
+            'idle': self.pool.get_idle_size(),
+        }}
+
+    async def close(self):
+        await self.pool.close()
+
+
+class AsyncHazelcastCounter:
+    """
+    Hazelcast IAtomicLong using the client's native futures.
+    No .blocking() proxy: each call returns a Hazelcast Future that is
+    bridged onto the event loop, so no thread waits per request.
+    """
+
+    def __init__(self):
+        import hazelcast
+
+        cluster_members = os.getenv(
+            'HAZELCAST_MEMBERS',
+            '172.27.0.11:5701,172.27.0.12:5701,172.27.0.13:5701'
+        ).split(',')
+        cluster_name = os.getenv('HAZELCAST_CLUSTER', 'task1-cluster')
+
+        self.client = hazelcast.HazelcastClient(
+            cluster_name=cluster_name,
+            cluster_members=cluster_members
+        )
+        self.counter = self.client.cp_subsystem.get_atomic_long("task1-counter")
+        self.epoch_counter = self.client.cp_subsystem.get_atomic_long("task1-counter-epoch")
+
+        print(f"✓ Connected to Hazelcast cluster: {cluster_name}")
+        print(f"  Members: {cluster_members}")
+
+    @staticmethod
+    def _await(hz_future) -> asyncio.Future:
+        """Bridge a Hazelcast Future (completed on a client thread) to asyncio."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def _set_result(f):
+            if future.cancelled():
+                return
+            try:
+                future.set_result(f.result())
+            except Exception as e:
+                future.set_exception(e)
+
+        hz_future.add_done_callback(lambda f: loop.call_soon_threadsafe(_set_result, f))
+        return future
+
+    async def increment(self) -> int:
+        return await self._await(self.counter.increment_and_get())
+
+    async def increment_by(self, n: int) -> int:
+        return await self._await(self.counter.add_and_get(n))
+
+    async def get(self) -> int:
+        return await self._await(self.counter.get())
+
+    async def reset(self) -> int:
+        await self._await(self.counter.set(0))
+        return await self._await(self.epoch_counter.increment_and_get())
+
+    async def close(self):
+        if self.client:
+            self.client.shutdown()
@@ -0,0 +1,77 @@
+"""
+Read-side cache for /count.
+
+Dashboards poll /count heavily; with a cache every read within the TTL is
+answered locally instead of hitting PostgreSQL/Hazelcast. Values written
+by this process's own increments refresh the cache immediately, so the
+only staleness is from other servers, bounded by the TTL.
+"""
+import threading
+import time
+from typing import Callable
+
+
+class ReadCache:
+    """
+    Single-value read cache with bounded staleness.
+
+    Args:
+        ttl_ms: Maximum age of a cached value in milliseconds
+    """
+
+    def __init__(self, ttl_ms: float):
+        self.ttl = ttl_ms / 1000.0
+        self._entry = None             # (value, expires_at), replaced atomically
+        self._refresh_lock = threading.Lock()
+
+        # Metrics (best effort - updated without locking)
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    def get(self, loader: Callable[[], int], strict: bool = False) -> int:
+        """Return a value at most `ttl` old, or always fresh when strict."""
+        if strict:
+            self.bypasses += 1
+            value = loader()
+            self._entry = (value, time.monotonic() + self.ttl)
+            return value
+
+        entry = self._entry
+        if entry is not None and time.monotonic() < entry[1]:
+            self.hits += 1
+            return entry[0]
+
+        # Single flight: one thread reloads, the others reuse its result
+        with self._refresh_lock:
+            entry = self._entry
+            if entry is not None and time.monotonic() < entry[1]:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            value = loader()
+            self._entry = (value, time.monotonic() + self.ttl)
+            return value
+
+    def observe(self, value: int):
+        """Refresh with a value this process just produced (e.g. from increment())."""
+        if value is None:
+            return
+        entry = self._entry
+        # Never move backwards: a slower concurrent request may report an older value
+        if entry is None or value >= entry[0]:
+            self._entry = (value, time.monotonic() + self.ttl)
+
+    def invalidate(self):
+        """Drop the cached value (e.g. after reset)."""
+        self._entry = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'ttl_ms': self.ttl * 1000,
+            'hits': self.hits,
+            'misses': self.misses,
+            'bypasses': self.bypasses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+        }
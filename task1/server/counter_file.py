@@ -1,42 +1,132 @@
-import os
-import threading
-
-
-class FileCounter:
-    """
-    Simple file-based counter.
-    Uses a text file + threading.Lock for thread safety.
-    Much simpler than SQLite!
-    """
-    def __init__(self, file_path: str = "/data/counter.txt"):
-        self.file_path = file_path
-        self._lock = threading.Lock()
-
-        # Create directory if it doesn't exist
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        # Initialize file with 0 if it doesn't exist
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w') as f:
-                f.write('0')
-
-    def increment(self) -> int:
-        with self._lock:
-            # Read current value
-            with open(self.file_path, 'r') as f:
-                value = int(f.read().strip() or '0')
-
-            # Increment
-            value += 1
-
-            # Write new value
-            with open(self.file_path, 'w') as f:
-                f.write(str(value))
-
-            return value
-
-    def get(self) -> int:
-        with self._lock:
-            with open(self.file_path, 'r') as f:
-                return int(f.read().strip() or '0')
-
+import os
+import struct
+import threading
+
+# Named counter record: name (UTF-8, NUL-padded) + int64 value
+_NAME_SIZE = 64
+_NAMED_RECORD = struct.Struct(f'<{_NAME_SIZE}sq')
+_VALUE = struct.Struct('<q')
+
+
+class FileCounter:
+    """
+    Simple file-based counter.
+    Uses a text file + threading.Lock for thread safety.
+    Much simpler than SQLite!
+    The file holds "<value>", or "<value> <epoch>" once it has been reset.
+    """
+    def __init__(self, file_path: str = "/data/counter.txt", lock=None):
+        self.file_path = file_path
+        # Any Lock-compatible object, e.g. metrics.TimedLock to measure contention
+        self._lock = lock or threading.Lock()
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        # Initialize file with 0 if it doesn't exist
+        if not os.path.exists(self.file_path):
+            with open(self.file_path, 'w') as f:
+                f.write('0')
+        self.epoch = self._read()[1]
+
+        self.named = NamedCounterFile(
+            os.path.join(os.path.dirname(file_path), "named_counters.bin")
+        )
+
+    def increment(self) -> int:
+        return self.increment_by(1)
+
+    def _read(self):
+        """(value, epoch) stored in the file"""
+        with open(self.file_path, 'r') as f:
+            fields = f.read().split()
+        value = int(fields[0]) if fields else 0
+        epoch = int(fields[1]) if len(fields) > 1 else 0
+        return value, epoch
+
+    def _write(self, value: int):
+        with open(self.file_path, 'w') as f:
+            f.write(f"{value} {self.epoch}" if self.epoch else str(value))
+
+    def increment_by(self, n: int) -> int:
+        with self._lock:
+            # Read current value
+            value = self._read()[0]
+
+            # Increment
+            value += n
+
+            # Write new value
+            self._write(value)
+
+            return value
+
+    def get(self) -> int:
+        with self._lock:
+            return self._read()[0]
+
+    def reset(self) -> int:
+        """Rewrite the file in place under the increment lock; returns the new epoch"""
+        with self._lock:
+            self.epoch = self._read()[1] + 1
+            self._write(0)
+            return self.epoch
+
+    def increment_named(self, name: str, n: int = 1) -> int:
+        return self.named.increment(name, n)
+
+    def get_named(self, name: str) -> int:
+        return self.named.get(name)
+
+
+class NamedCounterFile:
+    """
+    Compact multi-counter file: fixed-size (name, int64) records.
+    An in-memory index maps each name to its record offset, so an
+    increment is one dict lookup + one 8-byte pwrite, independent of
+    how many counters the file holds. New names are appended.
+    """
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self._lock = threading.Lock()
+        self._offsets = {}
+        self._values = {}
+
+        # Unbuffered; the file object closes the descriptor when collected
+        mode = 'r+b' if os.path.exists(file_path) else 'w+b'
+        self._file = open(file_path, mode, buffering=0)
+        self._fd = self._file.fileno()
+
+        data = self._file.read()
+        usable = len(data) - len(data) % _NAMED_RECORD.size
+        for offset in range(0, usable, _NAMED_RECORD.size):
+            raw_name, value = _NAMED_RECORD.unpack_from(data, offset)
+            name = raw_name.rstrip(b'\0').decode('utf-8')
+            self._offsets[name] = offset
+            self._values[name] = value
+        # Drop a partially appended record
+        if usable != len(data):
+            os.ftruncate(self._fd, usable)
+        self._end = usable
+
+    def increment(self, name: str, n: int = 1) -> int:
+        with self._lock:
+            offset = self._offsets.get(name)
+            value = self._values.get(name, 0) + n
+            if offset is None:
+                encoded = name.encode('utf-8')
+                if len(encoded) > _NAME_SIZE:
+                    raise ValueError(f"Counter name longer than {_NAME_SIZE} bytes: {name!r}")
+                offset = self._end
+                os.pwrite(self._fd, _NAMED_RECORD.pack(encoded, value), offset)
+                self._offsets[name] = offset
+                self._end += _NAMED_RECORD.size
+            else:
+                os.pwrite(self._fd, _VALUE.pack(value), offset + _NAME_SIZE)
+            self._values[name] = value
+            return value
+
+    def get(self, name: str) -> int:
+        with self._lock:
+            return self._values.get(name, 0)
+
@@ -1,50 +1,173 @@
-"""
-Hazelcast Counter Implementation for Task 1
-Uses IAtomicLong with CP Subsystem for distributed, fault-tolerant counting
-"""
-
-import hazelcast
-import os
-
-
-class HazelcastCounter:
-    def __init__(self):
-        """Initialize Hazelcast client and atomic counter"""
-        # Get Hazelcast cluster members from environment or use defaults
-        cluster_members = os.getenv(
-            'HAZELCAST_MEMBERS',
-            '172.27.0.11:5701,172.27.0.12:5701,172.27.0.13:5701'
-        ).split(',')
-
-        cluster_name = os.getenv('HAZELCAST_CLUSTER', 'task1-cluster')
-
-        # Create Hazelcast client
-        self.client = hazelcast.HazelcastClient(
-            cluster_name=cluster_name,
-            cluster_members=cluster_members
-        )
-
-        # Get atomic counter (CP Subsystem)
-        self.counter = self.client.cp_subsystem.get_atomic_long("task1-counter").blocking()
-
-        print(f"✓ Connected to Hazelcast cluster: {cluster_name}")
-        print(f"  Members: {cluster_members}")
-
-    def increment(self):
-        """Increment counter and return new value"""
-        return self.counter.increment_and_get()
-
-    def get(self):
-        """Get current counter value"""
-        return self.counter.get()
-
-    def reset(self):
-        """Reset counter to 0"""
-        self.counter.set(0)
-        return 0
-
-    def close(self):
-        """Shutdown Hazelcast client"""
-        if self.client:
-            self.client.shutdown()
-
+"""
+Hazelcast Counter Implementation for Task 1
+Uses IAtomicLong with CP Subsystem for distributed, fault-tolerant counting
+
+Modes:
+    strict - every increment is one Raft-replicated increment_and_get();
+             values form a global gap-free sequence and get() is exact
+    block  - each server reserves a block of values with one add_and_get(size)
+             and hands them out locally. Values are unique across servers and
+             increasing per server, but not globally ordered, and unused parts
+             of a block (on refill, reset or shutdown) leave gaps. get()
+             returns the number of values *reserved* cluster-wide, which is
+             >= the number of increments served.
+"""
+
+import hazelcast
+import os
+import threading
+import time
+
+MODES = ("strict", "block")
+
+
+class HazelcastCounter:
+    def __init__(self, mode: str = "strict", block_size: int = 0, block_max: int = 65536,
+                 block_target_ms: float = 1000.0):
+        """
+        Initialize Hazelcast client and atomic counter
+
+        Args:
+            mode: "strict" or "block" (see module docstring)
+            block_size: Fixed block size; 0 = adapt to the request rate
+            block_max: Upper bound for adaptive block sizes
+            block_target_ms: Adaptive mode aims for one refill per this interval
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown Hazelcast counter mode: {mode}")
+        # Get Hazelcast cluster members from environment or use defaults
+        cluster_members = os.getenv(
+            'HAZELCAST_MEMBERS',
+            '172.27.0.11:5701,172.27.0.12:5701,172.27.0.13:5701'
+        ).split(',')
+
+        cluster_name = os.getenv('HAZELCAST_CLUSTER', 'task1-cluster')
+
+        # Create Hazelcast client
+        self.client = hazelcast.HazelcastClient(
+            cluster_name=cluster_name,
+            cluster_members=cluster_members
+        )
+
+        # Get atomic counter (CP Subsystem)
+        self.counter = self.client.cp_subsystem.get_atomic_long("task1-counter").blocking()
+        self.epoch_counter = self.client.cp_subsystem.get_atomic_long("task1-counter-epoch").blocking()
+
+        # Block allocation state: values in [_next, _limit] are ours to hand out
+        self.mode = mode
+        self.block_size = block_size
+        self.block_max = block_max
+        self.block_target = block_target_ms / 1000.0
+        self._block_lock = threading.Lock()
+        self._next = 1
+        self._limit = 0
+        self._block_start = 1
+        self._current_block = block_size or 1
+        self._refilled_at = None
+        self._refills = 0
+        self._issued = 0
+        self._wasted = 0
+
+        # Named counters: one IAtomicLong per name, proxies cached locally
+        self._named = {}
+        self._named_lock = threading.Lock()
+
+        print(f"✓ Connected to Hazelcast cluster: {cluster_name}")
+        print(f"  Members: {cluster_members}")
+        if mode == "block":
+            print(f"  Block allocation: {block_size or 'adaptive'} values per CP round trip")
+
+    def increment(self):
+        """Increment counter and return new value"""
+        if self.mode == "block":
+            return self._take(1)
+        return self.counter.increment_and_get()
+
+    def increment_by(self, n):
+        """Add n in one CP round trip and return new value"""
+        if self.mode == "block":
+            return self._take(n)
+        return self.counter.add_and_get(n)
+
+    def _take(self, n):
+        """Hand out n values from the local block; the last one is returned"""
+        with self._block_lock:
+            if self._next + n - 1 > self._limit:
+                self._refill(n)
+            self._next += n
+            self._issued += n
+            return self._next - 1
+
+    def _refill(self, n):
+        """Reserve a new block with one add_and_get(). Caller holds _block_lock."""
+        now = time.monotonic()
+        if not self.block_size and self._refilled_at is not None:
+            # Size the next block so it lasts about block_target at the current rate
+            used = self._next - self._block_start
+            rate = used / max(now - self._refilled_at, 1e-6)
+            self._current_block = max(1, min(self.block_max, int(rate * self.block_target)))
+        size = max(self._current_block, n)
+        self._wasted += self._limit - self._next + 1
+        end = self.counter.add_and_get(size)
+        self._next = self._block_start = end - size + 1
+        self._limit = end
+        self._refilled_at = now
+        self._refills += 1
+
+    def get(self):
+        """Get current counter value (block mode: values reserved cluster-wide)"""
+        return self.counter.get()
+
+    def _named_counter(self, name):
+        """Get (or create once) the IAtomicLong proxy for a named counter"""
+        proxy = self._named.get(name)
+        if proxy is None:
+            with self._named_lock:
+                proxy = self._named.get(name)
+                if proxy is None:
+                    proxy = self.client.cp_subsystem.get_atomic_long(f"task1-counter:{name}").blocking()
+                    self._named[name] = proxy
+        return proxy
+
+    def increment_named(self, name, n=1):
+        """Add n to a named counter and return its new value"""
+        return self._named_counter(name).add_and_get(n)
+
+    def get_named(self, name):
+        """Get a named counter's value"""
+        return self._named_counter(name).get()
+
+    def reset(self):
+        """
+        Reset counter to 0 and return the new epoch
+        (block mode: other servers keep their current blocks)
+
+        set(0) is one linearizable CP operation, so concurrent increments
+        land entirely before or after it; the epoch is bumped right after.
+        """
+        with self._block_lock:
+            self.counter.set(0)
+            self._next, self._limit = 1, 0
+            self._block_start = 1
+        return self.epoch_counter.increment_and_get()
+
+    def stats(self):
+        """Block allocation metrics (empty in strict mode)"""
+        if self.mode != "block":
+            return {'mode': self.mode}
+        with self._block_lock:
+            return {
+                'mode': self.mode,
+                'block_size': self._current_block,
+                'refills': self._refills,
+                'issued': self._issued,
+                'remaining': self._limit - self._next + 1,
+                'wasted': self._wasted,
+                'avg_values_per_round_trip': self._issued / self._refills if self._refills else 0.0,
+            }
+
+    def close(self):
+        """Shutdown Hazelcast client"""
+        if self.client:
+            self.client.shutdown()
+
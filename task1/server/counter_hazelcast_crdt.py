@@ -0,0 +1,123 @@
+"""
+Hazelcast PN-Counter (CRDT) counter for Task 1
+Availability-first alternative to the CP Subsystem IAtomicLong
+
+Each increment is applied by one replica without consensus and replicated
+to the others asynchronously, so increments keep working while a member
+(or the CP leader) is down and cost one round trip without Raft. The
+trade-offs:
+    - get() may lag behind increments made through other members until
+      replication catches up (eventual convergence)
+    - increment() returns the value seen by the replica that applied it,
+      which is not a unique sequence number across servers
+    - increments acknowledged by a member that dies before replicating
+      them are lost
+    - reset() subtracts the observed value; it is not atomic with respect
+      to increments made through other servers
+"""
+
+import hazelcast
+from hazelcast.errors import ConsistencyLostError
+import os
+import threading
+
+
+class HazelcastCrdtCounter:
+    # increment_by() returns one replica's view, not a position in one sequence
+    sequential = False
+
+    def __init__(self, name: str = "task1-crdt-counter"):
+        """
+        Initialize Hazelcast client and PN counter
+
+        Args:
+            name: PN counter name (configured under pn-counter in hazelcast-config.yaml)
+        """
+        # Get Hazelcast cluster members from environment or use defaults
+        cluster_members = os.getenv(
+            'HAZELCAST_MEMBERS',
+            '172.27.0.11:5701,172.27.0.12:5701,172.27.0.13:5701'
+        ).split(',')
+
+        cluster_name = os.getenv('HAZELCAST_CLUSTER', 'task1-cluster')
+
+        # Create Hazelcast client
+        self.client = hazelcast.HazelcastClient(
+            cluster_name=cluster_name,
+            cluster_members=cluster_members
+        )
+
+        self.name = name
+        self.counter = self.client.get_pn_counter(name).blocking()
+        self.epoch_counter = self.client.get_pn_counter(f"{name}-epoch").blocking()
+        self._lost_sessions = 0
+
+        # Named counters: one PN counter per name, proxies cached locally
+        self._named = {}
+        self._named_lock = threading.Lock()
+
+        print(f"✓ Connected to Hazelcast cluster: {cluster_name}")
+        print(f"  Members: {cluster_members}")
+        print(f"  PN counter: {name} (replica-local increments, eventually consistent)")
+
+    def _call(self, proxy, method, *args):
+        """
+        Run one PN counter call; if every replica this client has read from
+        is gone, forget the observed timestamps and retry on a live replica
+        """
+        try:
+            return getattr(proxy, method)(*args)
+        except ConsistencyLostError:
+            self._lost_sessions += 1
+            proxy.reset()
+            return getattr(proxy, method)(*args)
+
+    def increment(self):
+        """Increment counter and return the value seen by the replica"""
+        return self._call(self.counter, "increment_and_get")
+
+    def increment_by(self, n):
+        """Add n in one round trip and return the value seen by the replica"""
+        return self._call(self.counter, "add_and_get", n)
+
+    def get(self):
+        """Get the counter value as seen by one replica"""
+        return self._call(self.counter, "get")
+
+    def _named_counter(self, name):
+        """Get (or create once) the PN counter proxy for a named counter"""
+        proxy = self._named.get(name)
+        if proxy is None:
+            with self._named_lock:
+                proxy = self._named.get(name)
+                if proxy is None:
+                    proxy = self.client.get_pn_counter(f"{self.name}:{name}").blocking()
+                    self._named[name] = proxy
+        return proxy
+
+    def increment_named(self, name, n=1):
+        """Add n to a named counter and return its new value"""
+        return self._call(self._named_counter(name), "add_and_get", n)
+
+    def get_named(self, name):
+        """Get a named counter's value"""
+        return self._call(self._named_counter(name), "get")
+
+    def reset(self):
+        """Subtract the observed value (PN counters have no set) and return the new epoch"""
+        value = self.get()
+        if value:
+            self._call(self.counter, "add_and_get", -value)
+        return self._call(self.epoch_counter, "increment_and_get")
+
+    def stats(self):
+        """Replica session metrics"""
+        return {
+            'mode': 'crdt',
+            'consistency_lost_retries': self._lost_sessions,
+        }
+
+    def close(self):
+        """Shutdown Hazelcast client"""
+        if self.client:
+            self.client.shutdown()
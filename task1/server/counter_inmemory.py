@@ -1,12 +1,35 @@
 import threading
+NAMED_STRIPES = 64
 class InMemoryCounter:
-    def __init__(self):
+    def __init__(self, lock=None):
         self.value = 0
-        self.lock = threading.Lock()
+        self.epoch = 0
+        # Any Lock-compatible object, e.g. metrics.TimedLock to measure contention
+        self.lock = lock or threading.Lock()
+        # Named counters: dict-of-stripes, each stripe with its own lock
+        self._named = [({}, threading.Lock()) for _ in range(NAMED_STRIPES)]
     def increment(self):
+        return self.increment_by(1)
+    def increment_by(self, n):
         with self.lock:
-            self.value += 1
+            self.value += n
             return self.value
     def get(self):
         with self.lock:
             return self.value
+    def reset(self):
+        # Same lock as increment: no increment straddles the reset
+        with self.lock:
+            self.value = 0
+            self.epoch += 1
+            return self.epoch
+    def increment_named(self, name, n=1):
+        values, lock = self._named[hash(name) % NAMED_STRIPES]
+        with lock:
+            value = values.get(name, 0) + n
+            values[name] = value
+            return value
+    def get_named(self, name):
+        values, lock = self._named[hash(name) % NAMED_STRIPES]
+        with lock:
+            return values.get(name, 0)
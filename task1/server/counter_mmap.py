@@ -0,0 +1,87 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+
+_SLOT = struct.Struct('<q')
+# File layout: counter value, then the reset epoch (8-byte files predate the epoch)
+_EPOCH_OFFSET = _SLOT.size
+_FILE_SIZE = 2 * _SLOT.size
+
+
+class MmapFileCounter:
+    """
+    File counter kept in a memory-mapped 16-byte file: the value and the
+    reset epoch as two little-endian int64 slots (an older 8-byte file holding
+    only the value is extended and read with epoch 0).
+    increment() and get() are plain memory operations - no open/read/parse/write
+    per request. Updates go to the page cache and are msync'ed every
+    `msync_every` increments (0 = leave write-back to the kernel).
+
+    An flock on the file serializes updates across processes, so several
+    server processes on the same host can share one counter file.
+    """
+    def __init__(self, file_path: str = "/data/counter.bin", msync_every: int = 0):
+        self.file_path = file_path
+        self.msync_every = msync_every
+        self._lock = threading.Lock()
+        self._unsynced = 0
+
+        # Create directory if it doesn't exist
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+        self._fd = os.open(file_path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            # A new (or truncated) file starts at 0; an old 8-byte file gets epoch 0
+            if os.fstat(self._fd).st_size < _FILE_SIZE:
+                os.ftruncate(self._fd, _FILE_SIZE)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._mm = mmap.mmap(self._fd, _FILE_SIZE)
+
+    def increment(self) -> int:
+        return self.increment_by(1)
+
+    def increment_by(self, n: int) -> int:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                value = _SLOT.unpack_from(self._mm, 0)[0] + n
+                _SLOT.pack_into(self._mm, 0, value)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+            if self.msync_every:
+                self._unsynced += 1
+                if self._unsynced >= self.msync_every:
+                    self._mm.flush()
+                    self._unsynced = 0
+            return value
+
+    def get(self) -> int:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_SH)
+            try:
+                return _SLOT.unpack_from(self._mm, 0)[0]
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def reset(self) -> int:
+        with self._lock:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                epoch = _SLOT.unpack_from(self._mm, _EPOCH_OFFSET)[0] + 1
+                _SLOT.pack_into(self._mm, 0, 0)
+                _SLOT.pack_into(self._mm, _EPOCH_OFFSET, epoch)
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            self._mm.flush()
+            return epoch
+
+    def close(self):
+        with self._lock:
+            self._mm.flush()
+            self._mm.close()
+            os.close(self._fd)
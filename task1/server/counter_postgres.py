@@ -1,119 +1,224 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from typing import Optional
-import os
-
-
-class PostgresCounter:
-    """PostgreSQL-backed counter using atomic in-place updates."""
-
-    def __init__(self, db_config: Optional[dict] = None):
-        """
-        Initialize PostgreSQL counter.
-
-        Args:
-            db_config: Database configuration dict with keys:
-                      host, port, database, user, password
-        """
-        if db_config is None:
-            db_config = {
-                'host': os.getenv('POSTGRES_HOST', 'localhost'),
-                'port': int(os.getenv('POSTGRES_PORT', 5432)),
-                'database': os.getenv('POSTGRES_DB', 'counter_db'),
-                'user': os.getenv('POSTGRES_USER', 'postgres'),
-                'password': os.getenv('POSTGRES_PASSWORD', 'postgres')
-            }
-
-        self.db_config = db_config
-        self._init_database()
-
-    def _get_connection(self):
-        """Create a new database connection."""
-        return psycopg2.connect(**self.db_config)
-
-    def _init_database(self):
-        """Initialize database table if it doesn't exist."""
-        conn = self._get_connection()
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS web_counter (
-                        counter_id INTEGER PRIMARY KEY,
-                        counter_value BIGINT NOT NULL DEFAULT 0
-                    )
-                """)
-
-                # Insert default counter if not exists
-                cursor.execute("""
-                    INSERT INTO web_counter (counter_id, counter_value)
-                    VALUES (1, 0)
-                    ON CONFLICT (counter_id) DO NOTHING
-                """)
-                conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
-
-    def increment(self) -> int:
-        """
-        Atomically increment counter and return new value.
-        Uses in-place update for best performance.
-
-        Returns:
-            New counter value after increment
-        """
-        conn = self._get_connection()
-        try:
-            with conn.cursor() as cursor:
-                # Atomic in-place update - fastest method from Task 2
-                cursor.execute("""
-                    UPDATE web_counter
-                    SET counter_value = counter_value + 1
-                    WHERE counter_id = 1
-                    RETURNING counter_value
-                """)
-                result = cursor.fetchone()
-                conn.commit()
-                return result[0] if result else 0
-        except Exception as e:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
-
-    def get(self) -> int:
-        """
-        Get current counter value.
-
-        Returns:
-            Current counter value
-        """
-        conn = self._get_connection()
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "SELECT counter_value FROM web_counter WHERE counter_id = 1"
-                )
-                result = cursor.fetchone()
-                return result[0] if result else 0
-        except Exception as e:
-            raise
-        finally:
-            conn.close()
-
-    def reset(self) -> None:
-        """Reset counter to 0."""
-        conn = self._get_connection()
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    "UPDATE web_counter SET counter_value = 0 WHERE counter_id = 1"
-                )
-                conn.commit()
-        except Exception as e:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()
+from typing import Optional
+import os
+
+from pg_pool import ConnectionPool, durability_on_connect, synchronous_commit_sql
+from group_commit import GroupCommitter
+
+
+class PostgresCounter:
+    """PostgreSQL-backed counter using atomic in-place updates."""
+
+    def __init__(self, db_config: Optional[dict] = None,
+                 pool_min: Optional[int] = None, pool_max: Optional[int] = None,
+                 group_commit: bool = False, group_window_ms: float = 2.0,
+                 group_max: int = 64, durability: Optional[str] = None,
+                 durability_scope: Optional[str] = None):
+        """
+        Initialize PostgreSQL counter.
+
+        Args:
+            db_config: Database configuration dict with keys:
+                      host, port, database, user, password
+            pool_min: Connections kept open in the pool (default: POSTGRES_POOL_MIN or 1)
+            pool_max: Upper bound on pooled connections (default: POSTGRES_POOL_MAX or 10)
+            group_commit: Coalesce concurrent increments into one UPDATE/commit
+            group_window_ms: How long the first caller of a batch waits for others
+            group_max: Maximum number of increments coalesced into one batch
+            durability: strict | local | async - synchronous_commit on / local / off
+                        (default: POSTGRES_DURABILITY or strict)
+            durability_scope: session (SET once per pooled connection) or
+                              transaction (SET LOCAL in every write transaction)
+                              (default: POSTGRES_DURABILITY_SCOPE or session)
+        """
+        if db_config is None:
+            db_config = {
+                'host': os.getenv('POSTGRES_HOST', 'localhost'),
+                'port': int(os.getenv('POSTGRES_PORT', 5432)),
+                'database': os.getenv('POSTGRES_DB', 'counter_db'),
+                'user': os.getenv('POSTGRES_USER', 'postgres'),
+                'password': os.getenv('POSTGRES_PASSWORD', 'postgres')
+            }
+
+        if pool_min is None:
+            pool_min = int(os.getenv('POSTGRES_POOL_MIN', 1))
+        if pool_max is None:
+            pool_max = int(os.getenv('POSTGRES_POOL_MAX', 10))
+
+        if durability is None:
+            durability = os.getenv('POSTGRES_DURABILITY', 'strict')
+        if durability_scope is None:
+            durability_scope = os.getenv('POSTGRES_DURABILITY_SCOPE', 'session')
+
+        self.db_config = db_config
+        self.durability = durability
+        self.durability_scope = durability_scope
+        # Per-transaction scope rides along with each write statement (no extra round trip)
+        setting = synchronous_commit_sql(durability, durability_scope)
+        self._txn_prefix = setting + "; " if durability_scope == 'transaction' else ""
+        on_connect = durability_on_connect(durability) if durability_scope == 'session' else None
+        self.pool = ConnectionPool(db_config, min_size=pool_min, max_size=pool_max, on_connect=on_connect)
+        self._init_database()
+
+        self._group = None
+        if group_commit:
+            self._group = GroupCommitter(
+                self._add, window=group_window_ms / 1000.0, max_batch=group_max
+            )
+
+    def _init_database(self):
+        """Initialize database table if it doesn't exist."""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS web_counter (
+                        counter_id INTEGER PRIMARY KEY,
+                        counter_value BIGINT NOT NULL DEFAULT 0
+                    )
+                """)
+                # Reset epoch (tables created before it existed get the column here)
+                cursor.execute(
+                    "ALTER TABLE web_counter ADD COLUMN IF NOT EXISTS epoch BIGINT NOT NULL DEFAULT 0"
+                )
+
+                # Insert default counter if not exists
+                cursor.execute("""
+                    INSERT INTO web_counter (counter_id, counter_value)
+                    VALUES (1, 0)
+                    ON CONFLICT (counter_id) DO NOTHING
+                """)
+
+                # Named counters, one row per name (primary key index lookup)
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS named_counter (
+                        name VARCHAR(64) PRIMARY KEY,
+                        counter_value BIGINT NOT NULL DEFAULT 0
+                    )
+                """)
+                conn.commit()
+
+    def increment(self) -> int:
+        """
+        Atomically increment counter and return new value.
+        Uses in-place update for best performance.
+
+        With group commit enabled, concurrent callers share one UPDATE and
+        commit, but each still receives its own distinct post-increment value.
+
+        Returns:
+            New counter value after increment
+        """
+        return self.increment_by(1)
+
+    def increment_by(self, n: int) -> int:
+        """
+        Atomically add n with a single UPDATE and return the new value.
+
+        Returns:
+            New counter value after increment
+        """
+        if self._group is not None:
+            return self._group.submit(n)
+        return self._add(n)
+
+    def _add(self, amount: int) -> int:
+        """Add ``amount`` in a single transaction and return the new value."""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                # Atomic in-place update - fastest method from Task 2
+                cursor.execute(self._txn_prefix + """
+                    UPDATE web_counter
+                    SET counter_value = counter_value + %s
+                    WHERE counter_id = 1
+                    RETURNING counter_value
+                """, (amount,))
+                result = cursor.fetchone()
+                conn.commit()
+                return result[0] if result else 0
+
+    def get(self) -> int:
+        """
+        Get current counter value.
+
+        Returns:
+            Current counter value
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT counter_value FROM web_counter WHERE counter_id = 1"
+                )
+                result = cursor.fetchone()
+                conn.commit()
+                return result[0] if result else 0
+
+    def increment_named(self, name: str, n: int = 1) -> int:
+        """
+        Atomically add n to a named counter, creating it on first use.
+
+        Returns:
+            New value of the named counter
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(self._txn_prefix + """
+                    INSERT INTO named_counter (name, counter_value)
+                    VALUES (%s, %s)
+                    ON CONFLICT (name) DO UPDATE
+                    SET counter_value = named_counter.counter_value + EXCLUDED.counter_value
+                    RETURNING counter_value
+                """, (name, n))
+                result = cursor.fetchone()
+                conn.commit()
+                return result[0] if result else 0
+
+    def get_named(self, name: str) -> int:
+        """
+        Get a named counter's value (0 if it was never incremented).
+
+        Returns:
+            Current value of the named counter
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT counter_value FROM named_counter WHERE name = %s", (name,)
+                )
+                result = cursor.fetchone()
+                conn.commit()
+                return result[0] if result else 0
+
+    def reset(self) -> int:
+        """
+        Reset counter to 0.
+
+        The row lock orders the reset with concurrent increments, so each
+        increment lands entirely before or after it.
+
+        Returns:
+            New reset epoch
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE web_counter SET counter_value = 0, epoch = epoch + 1 "
+                    "WHERE counter_id = 1 RETURNING epoch"
+                )
+                result = cursor.fetchone()
+                conn.commit()
+                return int(result[0]) if result else 0
+
+    def stats(self) -> dict:
+        """Connection pool and group commit metrics."""
+        stats = {
+            'pool': self.pool.stats(),
+            'durability': {'level': self.durability, 'scope': self.durability_scope},
+        }
+        if self._group is not None:
+            stats['group_commit'] = self._group.stats()
+        return stats
+
+    def close(self):
+        """Flush pending group commits and close pooled connections."""
+        if self._group is not None:
+            self._group.close()
+        self.pool.close()
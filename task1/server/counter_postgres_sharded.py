@@ -0,0 +1,187 @@
+import itertools
+import os
+import threading
+from typing import Optional
+
+from pg_pool import ConnectionPool, durability_on_connect, synchronous_commit_sql
+
+
+class ShardedPostgresCounter:
+    """
+    PostgreSQL-backed counter striped over N slot rows.
+
+    A single counter row makes every writer queue on the same row lock.
+    Here each writer thread updates its own slot row, and get() sums all
+    slots, so concurrent increments no longer contend with each other.
+    """
+
+    # increment_by() returns a total, not a position in one sequence
+    sequential = False
+
+    def __init__(self, db_config: Optional[dict] = None, shards: Optional[int] = None,
+                 pool_min: Optional[int] = None, pool_max: Optional[int] = None,
+                 durability: Optional[str] = None, durability_scope: Optional[str] = None):
+        """
+        Initialize sharded PostgreSQL counter.
+
+        Args:
+            db_config: Database configuration dict with keys:
+                      host, port, database, user, password
+            shards: Number of slot rows (default: POSTGRES_SHARDS or 8)
+            pool_min: Connections kept open in the pool (default: POSTGRES_POOL_MIN or 1)
+            pool_max: Upper bound on pooled connections (default: POSTGRES_POOL_MAX or 10)
+            durability: strict | local | async (default: POSTGRES_DURABILITY or strict)
+            durability_scope: session | transaction (default: POSTGRES_DURABILITY_SCOPE or session)
+        """
+        if db_config is None:
+            db_config = {
+                'host': os.getenv('POSTGRES_HOST', 'localhost'),
+                'port': int(os.getenv('POSTGRES_PORT', 5432)),
+                'database': os.getenv('POSTGRES_DB', 'counter_db'),
+                'user': os.getenv('POSTGRES_USER', 'postgres'),
+                'password': os.getenv('POSTGRES_PASSWORD', 'postgres')
+            }
+        if shards is None:
+            shards = int(os.getenv('POSTGRES_SHARDS', 8))
+        if pool_min is None:
+            pool_min = int(os.getenv('POSTGRES_POOL_MIN', 1))
+        if pool_max is None:
+            pool_max = int(os.getenv('POSTGRES_POOL_MAX', 10))
+        if durability is None:
+            durability = os.getenv('POSTGRES_DURABILITY', 'strict')
+        if durability_scope is None:
+            durability_scope = os.getenv('POSTGRES_DURABILITY_SCOPE', 'session')
+        if shards < 1:
+            raise ValueError("shards must be >= 1")
+
+        self.db_config = db_config
+        self.shards = shards
+        self.durability = durability
+        self.durability_scope = durability_scope
+        setting = synchronous_commit_sql(durability, durability_scope)
+        self._txn_prefix = setting + "; " if durability_scope == 'transaction' else ""
+        on_connect = durability_on_connect(durability) if durability_scope == 'session' else None
+        self.pool = ConnectionPool(db_config, min_size=pool_min, max_size=pool_max, on_connect=on_connect)
+
+        # Threads are assigned slots round-robin on first use
+        self._next_slot = itertools.count()
+        self._local = threading.local()
+
+        self._init_database()
+
+    def _init_database(self):
+        """Create the slot table and make sure all N slots exist."""
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS web_counter_shards (
+                        counter_id INTEGER NOT NULL,
+                        slot INTEGER NOT NULL,
+                        counter_value BIGINT NOT NULL DEFAULT 0,
+                        PRIMARY KEY (counter_id, slot)
+                    )
+                """)
+                cursor.execute(
+                    "ALTER TABLE web_counter_shards ADD COLUMN IF NOT EXISTS epoch BIGINT NOT NULL DEFAULT 0"
+                )
+
+                # Slots left over from a larger shard count still count in get()
+                cursor.execute("""
+                    INSERT INTO web_counter_shards (counter_id, slot, counter_value)
+                    SELECT 1, s, 0 FROM generate_series(0, %s - 1) AS s
+                    ON CONFLICT (counter_id, slot) DO NOTHING
+                """, (self.shards,))
+                conn.commit()
+
+    def _slot(self) -> int:
+        slot = getattr(self._local, 'slot', None)
+        if slot is None:
+            slot = next(self._next_slot) % self.shards
+            self._local.slot = slot
+        return slot
+
+    def increment(self) -> int:
+        """Increment this thread's slot and return the counter total."""
+        return self.increment_by(1)
+
+    def increment_by(self, n: int) -> int:
+        """
+        Add n to this thread's slot and return the counter total.
+
+        The total is computed in the same statement from the transaction's
+        snapshot, so it is an up-to-date reading but - unlike the single-row
+        counter - not a unique sequence number.
+
+        Returns:
+            Counter value (sum of all slots) after the increment
+        """
+        slot = self._slot()
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(self._txn_prefix + """
+                    WITH upd AS (
+                        UPDATE web_counter_shards
+                        SET counter_value = counter_value + %s
+                        WHERE counter_id = 1 AND slot = %s
+                        RETURNING counter_value
+                    )
+                    SELECT (SELECT counter_value FROM upd) + COALESCE(
+                        (SELECT SUM(counter_value) FROM web_counter_shards
+                         WHERE counter_id = 1 AND slot <> %s), 0)
+                """, (n, slot, slot))
+                result = cursor.fetchone()
+                conn.commit()
+                return int(result[0]) if result and result[0] is not None else 0
+
+    def get(self) -> int:
+        """
+        Get current counter value.
+
+        Returns:
+            Sum of all slot rows
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    "SELECT COALESCE(SUM(counter_value), 0) FROM web_counter_shards WHERE counter_id = 1"
+                )
+                result = cursor.fetchone()
+                conn.commit()
+                return int(result[0]) if result else 0
+
+    def reset(self) -> int:
+        """
+        Reset all slots to 0 in one statement.
+
+        The statement locks every slot row, so concurrent increments land
+        entirely before or after the reset.
+
+        Returns:
+            New reset epoch (kept on every slot row)
+        """
+        with self.pool.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    WITH upd AS (
+                        UPDATE web_counter_shards
+                        SET counter_value = 0, epoch = epoch + 1
+                        WHERE counter_id = 1
+                        RETURNING epoch
+                    )
+                    SELECT MAX(epoch) FROM upd
+                """)
+                result = cursor.fetchone()
+                conn.commit()
+                return int(result[0]) if result and result[0] is not None else 0
+
+    def stats(self) -> dict:
+        """Connection pool metrics."""
+        return {
+            'shards': self.shards,
+            'pool': self.pool.stats(),
+            'durability': {'level': self.durability, 'scope': self.durability_scope},
+        }
+
+    def close(self):
+        """Close pooled connections."""
+        self.pool.close()
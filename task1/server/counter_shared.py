@@ -0,0 +1,59 @@
+"""
+Shared-memory counter for the pre-fork multi-process server mode.
+
+The 64-bit value lives in a multiprocessing.shared_memory segment that
+every forked worker maps, so increments from all processes hit the same
+slot and the in-memory backend is no longer limited to one core by the GIL.
+"""
+import multiprocessing
+import struct
+from multiprocessing import shared_memory
+
+_SLOT = struct.Struct('<q')
+_EPOCH_OFFSET = _SLOT.size
+
+
+class SharedMemoryCounter:
+    """
+    Exact counter shared by forked worker processes.
+
+    CPython has no atomic fetch-and-add on shared memory, so the
+    read-modify-write of the 8-byte slot is guarded by one process-shared
+    lock (a futex-backed semaphore) held only for the update itself.
+    Must be created in the parent before the workers are forked.
+    """
+
+    def __init__(self):
+        ctx = multiprocessing.get_context("fork")
+        # Counter value, then the reset epoch
+        self._shm = shared_memory.SharedMemory(create=True, size=2 * _SLOT.size)
+        self._buf = self._shm.buf
+        self._lock = ctx.Lock()
+        _SLOT.pack_into(self._buf, 0, 0)
+        _SLOT.pack_into(self._buf, _EPOCH_OFFSET, 0)
+
+    def increment(self) -> int:
+        return self.increment_by(1)
+
+    def increment_by(self, n: int) -> int:
+        with self._lock:
+            value = _SLOT.unpack_from(self._buf, 0)[0] + n
+            _SLOT.pack_into(self._buf, 0, value)
+            return value
+
+    def get(self) -> int:
+        with self._lock:
+            return _SLOT.unpack_from(self._buf, 0)[0]
+
+    def reset(self) -> int:
+        with self._lock:
+            epoch = _SLOT.unpack_from(self._buf, _EPOCH_OFFSET)[0] + 1
+            _SLOT.pack_into(self._buf, 0, 0)
+            _SLOT.pack_into(self._buf, _EPOCH_OFFSET, epoch)
+            return epoch
+
+    def close(self):
+        """Release the segment (call once, from the parent process)."""
+        self._buf = None
+        self._shm.close()
+        self._shm.unlink()
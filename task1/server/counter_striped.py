@@ -0,0 +1,100 @@
+"""
+Striped in-memory counter (a LongAdder-style backend).
+
+InMemoryCounter serializes every worker thread on one lock. Here each
+thread is assigned one of N cells, each cell has its own lock, and get()
+sums the cells, so concurrent increments from different threads rarely
+touch the same lock. This pays off at high thread counts and on
+free-threaded (no-GIL) Python builds, where the single lock is the
+bottleneck rather than the interpreter.
+"""
+import itertools
+import os
+import threading
+
+
+class StripedInMemoryCounter:
+    """
+    In-memory counter striped over per-thread cells.
+
+    Args:
+        stripes: Number of cells (default: 2 x CPU count, at least 8)
+        exact: Hand out an exact, gap-free post-increment sequence number.
+               That needs one global ordering point, so exact mode keeps a
+               single sequence lock for increments; it only exists so /inc
+               can keep its contract. Without it, increment() returns a
+               recent total that includes the caller's increment, which
+               is not a unique sequence number.
+        lock_factory: Creates the per-cell locks, e.g. a metrics.TimedLock
+    """
+
+    def __init__(self, stripes: int = None, exact: bool = False, lock_factory=threading.Lock):
+        if stripes is None:
+            stripes = max(8, 2 * (os.cpu_count() or 1))
+        if stripes < 1:
+            raise ValueError("stripes must be >= 1")
+        self.stripes = stripes
+        self.exact = exact
+        self.sequential = exact
+        # Cell values in one flat list, so the total is a single C-level sum()
+        self._values = [0] * stripes
+        self._locks = [lock_factory() for _ in range(stripes)]
+
+        # Exact mode: global post-increment sequence
+        self._seq = 0
+        self._seq_lock = lock_factory()
+        self.epoch = 0
+
+        # Threads are assigned cells round-robin on first use
+        self._next_cell = itertools.count()
+        self._local = threading.local()
+
+    def _cell(self) -> int:
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = next(self._next_cell) % self.stripes
+        return cell
+
+    def increment(self) -> int:
+        return self.increment_by(1)
+
+    def increment_by(self, n: int) -> int:
+        if self.exact:
+            with self._seq_lock:
+                self._seq += n
+                return self._seq
+        cell = self._cell()
+        with self._locks[cell]:
+            self._values[cell] += n
+        return self._sum()
+
+    def _sum(self) -> int:
+        # Cells are read one by one without their locks: a recent total, not a snapshot
+        return self._seq + sum(self._values)
+
+    def get(self) -> int:
+        if self.exact:
+            with self._seq_lock:
+                return self._seq
+        return self._sum()
+
+    def reset(self) -> int:
+        """Zero all cells while holding every cell lock (in a fixed order); returns the new epoch."""
+        with self._seq_lock:
+            for lock in self._locks:
+                lock.acquire()
+            try:
+                self._seq = 0
+                self._values[:] = [0] * self.stripes
+                self.epoch += 1
+                return self.epoch
+            finally:
+                for lock in reversed(self._locks):
+                    lock.release()
+
+    def stats(self) -> dict:
+        return {
+            'stripes': self.stripes,
+            'exact': self.exact,
+            'cells': list(self._values),
+        }
@@ -0,0 +1,205 @@
+"""
+Write-ahead-log + snapshot file counter.
+
+Instead of rewriting counter.txt on every increment, each increment
+appends one fixed-size record to a log file that stays open, and the log
+is periodically compacted into a snapshot. On startup the snapshot is
+loaded and the log replayed, so the counter survives crashes.
+
+On-disk layout (in wal_dir):
+    snapshot          value (int64), generation (int64), epoch (int64), crc32
+                      (snapshots without the epoch are still read, as epoch 0)
+    wal.<gen>.log     records of delta (int64), crc32(delta)
+"""
+import os
+import struct
+import threading
+import zlib
+
+_SNAPSHOT = struct.Struct('<qqqI')
+_SNAPSHOT_V1 = struct.Struct('<qqI')
+_RECORD = struct.Struct('<qI')
+
+FSYNC_POLICIES = ("every", "interval", "never")
+
+
+def _record(delta: int) -> bytes:
+    payload = struct.pack('<q', delta)
+    return _RECORD.pack(delta, zlib.crc32(payload))
+
+
+class WalFileCounter:
+    """
+    Log-structured file counter with configurable durability.
+
+    fsync policy:
+        every    - fsync after each increment (survives OS/power loss)
+        interval - fsync from a background thread every fsync_interval_ms
+        never    - leave flushing to the OS (survives process crashes only)
+    """
+
+    def __init__(self, wal_dir: str = "/data/wal", fsync: str = "every",
+                 fsync_interval_ms: float = 10.0, compact_every: int = 100000):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+
+        self.wal_dir = wal_dir
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000.0
+        self.compact_every = compact_every
+
+        self._lock = threading.Lock()
+        self._fd = None
+        self._dirty = False
+        self.value = 0
+        self.generation = 0
+        self.epoch = 0      # number of resets
+        self._records = 0  # records in the current log since the last snapshot
+
+        os.makedirs(wal_dir, exist_ok=True)
+        self._recover()
+
+        self._stop = threading.Event()
+        self._syncer = None
+        if fsync == "interval":
+            self._syncer = threading.Thread(target=self._sync_loop, name="wal-fsync", daemon=True)
+            self._syncer.start()
+
+    # ---- paths -------------------------------------------------------------
+
+    def _snapshot_path(self) -> str:
+        return os.path.join(self.wal_dir, "snapshot")
+
+    def _log_path(self, generation: int) -> str:
+        return os.path.join(self.wal_dir, f"wal.{generation}.log")
+
+    def _fsync_dir(self):
+        fd = os.open(self.wal_dir, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    # ---- recovery ----------------------------------------------------------
+
+    def _recover(self):
+        """Load the snapshot, replay its log and drop a torn tail record."""
+        path = self._snapshot_path()
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) == _SNAPSHOT.size:
+                value, generation, epoch, crc = _SNAPSHOT.unpack(data)
+            elif len(data) == _SNAPSHOT_V1.size:
+                (value, generation, crc), epoch = _SNAPSHOT_V1.unpack(data), 0
+            else:
+                raise ValueError(f"Corrupt snapshot {path}: {len(data)} bytes")
+            if zlib.crc32(data[:-4]) != crc:
+                raise ValueError(f"Corrupt snapshot {path}: checksum mismatch")
+            self.value, self.generation, self.epoch = value, generation, epoch
+
+        log_path = self._log_path(self.generation)
+        good = 0
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as f:
+                data = f.read()
+            for offset in range(0, len(data) - _RECORD.size + 1, _RECORD.size):
+                delta, crc = _RECORD.unpack_from(data, offset)
+                if zlib.crc32(data[offset:offset + 8]) != crc:
+                    break
+                self.value += delta
+                good += 1
+
+        self._fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        # Cut off a partially written record left by a crash
+        os.ftruncate(self._fd, good * _RECORD.size)
+        self._records = good
+
+        # Logs of older generations are already folded into the snapshot
+        for name in os.listdir(self.wal_dir):
+            if name.startswith("wal.") and name != os.path.basename(log_path):
+                os.remove(os.path.join(self.wal_dir, name))
+
+    # ---- writes ------------------------------------------------------------
+
+    def _add(self, delta: int) -> int:
+        """Log and apply one delta. Caller holds the lock."""
+        os.write(self._fd, _record(delta))
+        self.value += delta
+        self._records += 1
+        if self.fsync == "every":
+            os.fdatasync(self._fd)
+        else:
+            self._dirty = True
+        if self._records >= self.compact_every:
+            self._compact(self.value)
+        return self.value
+
+    def _compact(self, value: int, epoch: int = None):
+        """Write a snapshot of `value` and start an empty log. Caller holds the lock."""
+        generation = self.generation + 1
+        if epoch is None:
+            epoch = self.epoch
+        payload = struct.pack('<qqq', value, generation, epoch)
+        tmp = self._snapshot_path() + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(payload + struct.pack('<I', zlib.crc32(payload)))
+            f.flush()
+            os.fsync(f.fileno())
+        # Atomic switch: before this the old snapshot+log are authoritative
+        os.replace(tmp, self._snapshot_path())
+
+        old_fd, old_generation = self._fd, self.generation
+        self._fd = os.open(self._log_path(generation), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._fsync_dir()
+        os.close(old_fd)
+        os.remove(self._log_path(old_generation))
+
+        self.value = value
+        self.generation = generation
+        self.epoch = epoch
+        self._records = 0
+        self._dirty = False
+
+    def _sync_loop(self):
+        while not self._stop.wait(self.fsync_interval):
+            with self._lock:
+                if self._dirty:
+                    os.fdatasync(self._fd)
+                    self._dirty = False
+
+    # ---- counter API -------------------------------------------------------
+
+    def increment(self) -> int:
+        return self.increment_by(1)
+
+    def increment_by(self, n: int) -> int:
+        """Append a single record for the whole delta."""
+        with self._lock:
+            return self._add(n)
+
+    def get(self) -> int:
+        with self._lock:
+            return self.value
+
+    def reset(self) -> int:
+        """Reset to 0 by writing a zero snapshot (no log replay can resurrect old values)."""
+        with self._lock:
+            self._compact(0, self.epoch + 1)
+            return self.epoch
+
+    def compact(self):
+        """Fold the log into a new snapshot now."""
+        with self._lock:
+            self._compact(self.value)
+
+    def close(self):
+        """Stop the background syncer and flush the log."""
+        self._stop.set()
+        if self._syncer is not None:
+            self._syncer.join()
+        with self._lock:
+            if self._fd is not None:
+                os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
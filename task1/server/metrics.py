@@ -0,0 +1,283 @@
+"""
+Prometheus-style metrics with lock-free per-thread accumulators.
+
+Every thread writes only to its own shard (a plain dict), so recording a
+sample never takes a lock. /metrics sums the shards at scrape time.
+Shards of finished threads (Werkzeug starts one thread per connection)
+are folded into a retired total so the shard list stays bounded.
+"""
+import threading
+import time
+from bisect import bisect_left
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_SWEEP_EVERY = 64   # fold dead-thread shards after this many new shards
+
+
+class _Shard:
+    __slots__ = ('thread', 'values')
+
+    def __init__(self, thread):
+        self.thread = thread
+        self.values = {}    # (metric, label values) -> [float] or histogram list
+
+
+class Registry:
+    """Holds metric families and the per-thread shards they write to."""
+
+    def __init__(self):
+        self._metrics = []
+        self._local = threading.local()
+        self._lock = threading.Lock()      # shard registration and scrapes only
+        self._shards = []
+        self._retired = {}
+        self._new_shards = 0
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.values
+        except AttributeError:
+            shard = _Shard(threading.current_thread())
+            with self._lock:
+                self._shards.append(shard)
+                self._new_shards += 1
+                if self._new_shards >= _SWEEP_EVERY:
+                    self._sweep()
+            self._local.values = shard.values
+            return shard.values
+
+    def _sweep(self):
+        """Fold shards of finished threads into the retired totals. Caller holds the lock."""
+        alive = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                alive.append(shard)
+            else:
+                _merge_into(self._retired, shard.values)
+        self._shards = alive
+        self._new_shards = 0
+
+    def _collect(self) -> dict:
+        with self._lock:
+            self._sweep()
+            totals = {}
+            _merge_into(totals, self._retired)
+            for shard in self._shards:
+                # list() copies atomically under the GIL even while the owner writes
+                _merge_into(totals, dict(list(shard.values.items())))
+        return totals
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> "Counter":
+        return self._add(Counter(self, name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: tuple = ()) -> "Gauge":
+        return self._add(Gauge(self, name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (),
+                  buckets: tuple = DEFAULT_BUCKETS) -> "Histogram":
+        return self._add(Histogram(self, name, help, labels, buckets))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        totals = self._collect()
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            series = sorted((k[1], v) for k, v in totals.items() if k[0] is metric)
+            lines.extend(metric.render(series))
+        return "\n".join(lines) + "\n"
+
+
+def _merge_into(totals: dict, values: dict):
+    for key, value in values.items():
+        current = totals.get(key)
+        if current is None:
+            totals[key] = list(value)
+        else:
+            for i, v in enumerate(value):
+                current[i] += v
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, registry, name, help, labels):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def inc(self, label_values: tuple = (), amount: float = 1):
+        values = self.registry._shard()
+        key = (self, label_values)
+        slot = values.get(key)
+        if slot is None:
+            values[key] = [amount]
+        else:
+            slot[0] += amount
+
+    def render(self, series):
+        for label_values, (value,) in series:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Up/down value; per-thread deltas sum to the current value."""
+    type = "gauge"
+
+    def add(self, label_values: tuple = (), amount: float = 1):
+        self.inc(label_values, amount)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, registry, name, help, labels, buckets):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self._size = len(self.buckets) + 3     # buckets, +Inf, sum, count
+
+    def observe(self, seconds: float, label_values: tuple = ()):
+        values = self.registry._shard()
+        key = (self, label_values)
+        slot = values.get(key)
+        if slot is None:
+            slot = values[key] = [0] * self._size
+        slot[bisect_left(self.buckets, seconds)] += 1
+        slot[-2] += seconds
+        slot[-1] += 1
+
+    def render(self, series):
+        for label_values, slot in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), slot[:-2]):
+                cumulative += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_format_labels(self.labels, label_values, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labels, label_values)} {_format_value(slot[-2])}"
+            yield f"{self.name}_count{_format_labels(self.labels, label_values)} {slot[-1]}"
+
+
+# ============================================================
+# Server metrics
+# ============================================================
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "counter_http_requests_total", "HTTP requests handled", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "counter_http_request_duration_seconds", "HTTP request latency", ("route",))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    "counter_http_requests_in_flight", "HTTP requests currently being served")
+BACKEND_LATENCY = REGISTRY.histogram(
+    "counter_backend_call_duration_seconds", "Counter backend call latency", ("backend", "op"))
+BACKEND_ERRORS = REGISTRY.counter(
+    "counter_backend_errors_total", "Counter backend calls that raised", ("backend", "op"))
+LOCK_ACQUIRES = REGISTRY.counter(
+    "counter_lock_acquisitions_total", "Counter lock acquisitions", ("lock",))
+LOCK_CONTENDED = REGISTRY.counter(
+    "counter_lock_contended_total", "Lock acquisitions that had to wait", ("lock",))
+LOCK_WAIT = REGISTRY.histogram(
+    "counter_lock_wait_seconds", "Time spent waiting for a contended lock", ("lock",))
+
+INSTRUMENTED_OPS = ("increment", "increment_by", "get", "increment_named", "get_named", "reset")
+
+
+class TimedLock:
+    """
+    threading.Lock that records how long contended acquisitions wait.
+
+    The uncontended path is one non-blocking acquire plus a counter bump;
+    only threads that actually block pay for the clock reads.
+    """
+
+    def __init__(self, name: str):
+        self._lock = threading.Lock()
+        self._labels = (name,)
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        LOCK_ACQUIRES.inc(self._labels)
+        if self._lock.acquire(False):
+            return True
+        if not blocking:
+            return False
+        start = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        LOCK_CONTENDED.inc(self._labels)
+        LOCK_WAIT.observe(time.perf_counter() - start, self._labels)
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc):
+        self._lock.release()
+
+
+_call_state = threading.local()
+
+
+def _timed(method, labels):
+    def call(*args, **kwargs):
+        # increment() usually delegates to increment_by(); time the outer call only
+        if getattr(_call_state, "active", False):
+            return method(*args, **kwargs)
+        _call_state.active = True
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            BACKEND_ERRORS.inc(labels)
+            raise
+        finally:
+            BACKEND_LATENCY.observe(time.perf_counter() - start, labels)
+            _call_state.active = False
+    call.__name__ = method.__name__
+    call.__doc__ = method.__doc__
+    return call
+
+
+def instrument_counter(counter, backend: str):
+    """
+    Time every backend call of `counter` in place.
+
+    Bound methods are replaced on the instance, so the object keeps its
+    class and callers see the same interface.
+    """
+    for op in INSTRUMENTED_OPS:
+        method = getattr(counter, op, None)
+        if method is not None:
+            setattr(counter, op, _timed(method, (backend, op)))
+    return counter
@@ -0,0 +1,295 @@
+"""
+Bounded, thread-safe PostgreSQL connection pool.
+
+Connections are reused across Flask worker threads instead of paying
+a TCP handshake + authentication on every request.
+
+Canonical copy: task1/server/pg_pool.py. Each task directory is its own
+Docker build context, so task2/pg_pool.py is a byte-for-byte copy: edit
+the canonical file and copy it over.
+"""
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+
+
+# Durability tiers, mapped to PostgreSQL's synchronous_commit
+DURABILITY_LEVELS = {
+    'strict': 'on',      # commit waits for the WAL flush (and synchronous standbys)
+    'local': 'local',    # waits for the local WAL flush only, not for standbys
+    'async': 'off',      # returns before the flush; a crash can lose the last few
+                         # hundred ms of commits, but never corrupts data
+}
+DURABILITY_SCOPES = ('session', 'transaction')
+
+
+def synchronous_commit_sql(durability: str, scope: str = 'session') -> str:
+    """SET statement for a durability tier; 'transaction' scope uses SET LOCAL."""
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(f"Unknown durability: {durability}")
+    if scope not in DURABILITY_SCOPES:
+        raise ValueError(f"Unknown durability scope: {scope}")
+    local = 'LOCAL ' if scope == 'transaction' else ''
+    return f"SET {local}synchronous_commit = {DURABILITY_LEVELS[durability]}"
+
+
+def durability_on_connect(durability: str):
+    """Pool on_connect hook applying a durability tier to the whole session."""
+    setting = synchronous_commit_sql(durability, 'session')
+
+    def setup(conn):
+        with conn.cursor() as cursor:
+            cursor.execute(setting)
+        conn.commit()
+    return setup
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes available within the timeout."""
+
+
+class _Waiter:
+    """A thread blocked in getconn(); served strictly in FIFO order."""
+    __slots__ = ('event', 'conn', 'last_used', 'slot')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.conn = None         # connection handed over by putconn()
+        self.last_used = 0.0
+        self.slot = False        # True if a freed slot was reserved for us
+
+
+class ConnectionPool:
+    """
+    Fixed-bounds connection pool with health-check on checkout.
+
+    Args:
+        db_config: Keyword arguments passed to psycopg2.connect()
+        min_size: Connections opened eagerly and kept open
+        max_size: Hard upper bound on open connections
+        timeout: Seconds to wait for a free connection before PoolTimeout
+        health_check_after: Idle seconds after which a connection is
+                            verified with ``SELECT 1`` before being handed out
+        on_connect: Called with every new connection before first use
+                    (e.g. to PREPARE statements or SET session options)
+    """
+
+    def __init__(self, db_config: dict, min_size: int = 1, max_size: int = 10,
+                 timeout: float = 30.0, health_check_after: float = 5.0, on_connect=None):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool bounds: min={min_size}, max={max_size}")
+
+        self.db_config = db_config
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_after = health_check_after
+        self.on_connect = on_connect
+
+        self._lock = threading.Lock()
+        self._waiters = deque()
+        self._idle = []          # stack of (connection, last_used) - LIFO keeps hot connections hot
+        self._size = 0           # open connections (idle + in use)
+        self._closed = False
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._recycled = 0
+        self._in_use_peak = 0
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.db_config)
+        if self.on_connect is not None:
+            try:
+                self.on_connect(conn)
+            except Exception:
+                conn.close()
+                raise
+        return conn
+
+    def _is_healthy(self, conn, last_used: float) -> bool:
+        """Cheap check always; round-trip check only for long-idle connections."""
+        if conn.closed:
+            return False
+        if time.monotonic() - last_used < self.health_check_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        """Close a broken connection and free its slot. Caller holds the lock."""
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+        self._size -= 1
+        self._recycled += 1
+        self._wake_for_slot()
+
+    def _wake_for_slot(self):
+        """Let the oldest waiter open a new connection. Caller holds the lock."""
+        if self._waiters and self._size < self.max_size:
+            waiter = self._waiters.popleft()
+            waiter.slot = True
+            self._size += 1
+            waiter.event.set()
+
+    def getconn(self):
+        """Check out a connection, blocking up to ``timeout`` seconds."""
+        start = time.monotonic()
+        waited = False
+        while True:
+            conn = None
+            waiter = None
+            with self._lock:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                if self._idle and not self._waiters:
+                    conn, last_used = self._idle.pop()
+                elif self._size < self.max_size and not self._waiters:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+                else:
+                    waiter = _Waiter()
+                    self._waiters.append(waiter)
+
+            if waiter is not None:
+                waited = True
+                remaining = self.timeout - (time.monotonic() - start)
+                waiter.event.wait(max(remaining, 0))
+                with self._lock:
+                    if not waiter.event.is_set():
+                        self._waiters.remove(waiter)
+                        raise PoolTimeout(
+                            f"No connection available within {self.timeout}s "
+                            f"(max_size={self.max_size})"
+                        )
+                    if self._closed and waiter.conn is None and not waiter.slot:
+                        raise PoolTimeout("Connection pool is closed")
+                conn, last_used = waiter.conn, waiter.last_used
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._wake_for_slot()
+                    raise
+                with self._lock:
+                    return self._checked_out(conn, start, waited)
+
+            # Health check runs outside the lock so it never stalls other threads
+            if self._is_healthy(conn, last_used):
+                with self._lock:
+                    return self._checked_out(conn, start, waited)
+            with self._lock:
+                self._discard(conn)
+
+    def _checked_out(self, conn, start: float, waited: bool):
+        """Record checkout metrics. Caller holds the lock."""
+        wait = time.monotonic() - start
+        self._checkouts += 1
+        if waited:
+            self._waits += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        in_use = self._size - len(self._idle)
+        self._in_use_peak = max(self._in_use_peak, in_use)
+        return conn
+
+    def putconn(self, conn, broken: bool = False):
+        """Return a connection; broken or closed connections are recycled."""
+        # Never return a connection with an open transaction
+        if not broken and not conn.closed and \
+                conn.info.transaction_status != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+
+        with self._lock:
+            if broken or conn.closed or self._closed:
+                self._discard(conn)
+                return
+            if self._waiters:
+                # Hand over directly so returning threads cannot barge ahead
+                waiter = self._waiters.popleft()
+                waiter.conn = conn
+                waiter.last_used = time.monotonic()
+                waiter.event.set()
+            else:
+                self._idle.append((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager for a pooled connection.
+
+        Rolls back on error; connection-level failures (OperationalError,
+        InterfaceError) cause the connection to be closed and replaced.
+        """
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def stats(self) -> dict:
+        """Pool size, utilization and checkout wait-time metrics."""
+        with self._lock:
+            idle = len(self._idle)
+            in_use = self._size - idle
+            return {
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'size': self._size,
+                'idle': idle,
+                'in_use': in_use,
+                'in_use_peak': self._in_use_peak,
+                'utilization': in_use / self.max_size,
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_avg_ms': (self._wait_total / self._checkouts * 1000) if self._checkouts else 0.0,
+                'wait_max_ms': self._wait_max * 1000,
+                'recycled': self._recycled,
+            }
+
+    def close(self):
+        """Close all idle connections; in-use ones are closed on return."""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.pop()
+                try:
+                    conn.close()
+                except psycopg2.Error:
+                    pass
+                self._size -= 1
+            while self._waiters:
+                self._waiters.popleft().event.set()
@@ -1,72 +1,344 @@
-import argparse
-from flask import Flask, jsonify, request
-from counter_inmemory import InMemoryCounter
-from counter_file import FileCounter
-from counter_postgres import PostgresCounter
-from counter_hazelcast import HazelcastCounter
-
-app = Flask(__name__)
-counter = None
-
-
-@app.route("/inc", methods=["POST", "GET"])
-def inc():
-    """Increment the counter"""
-    new = counter.increment()
-    return jsonify({"value": new}), 200
-
-
-@app.route("/count", methods=["GET"])
-def count():
-    """Return current counter value"""
-    return jsonify({"value": counter.get()}), 200
-
-
-@app.route("/reset", methods=["POST"])
-def reset():
-    """Reset counter to 0 (useful for testing)"""
-    global counter
-    if isinstance(counter, InMemoryCounter):
-        counter = InMemoryCounter()
-    elif isinstance(counter, FileCounter):
-        import os
-        file_path = counter.file_path
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        counter = FileCounter(file_path=file_path)
-    elif isinstance(counter, HazelcastCounter):
-        counter.reset()
-    else:
-        counter.reset()
-    return jsonify({"message": "Counter reset", "value": counter.get()}), 200
-
-
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--backend", choices=["inmemory", "file", "postgres", "hazelcast"], default="inmemory")
-    parser.add_argument("--port", type=int, default=8080)
-    parser.add_argument("--file", default="/data/counter.txt")
-    args = parser.parse_args()
-
-    global counter
-    if args.backend == "inmemory":
-        print(f"Using in-memory backend")
-        counter = InMemoryCounter()
-    elif args.backend == "file":
-        print(f"Using file backend (file={args.file})")
-        counter = FileCounter(file_path=args.file)
-    elif args.backend == "postgres":
-        print(f"Using PostgreSQL backend (atomic in-place update)")
-        counter = PostgresCounter()
-    elif args.backend == "hazelcast":
-        print(f"Using Hazelcast backend (CP Subsystem with IAtomicLong)")
-        counter = HazelcastCounter()
-
-    print(f"Starting server on port {args.port}")
-    # threaded=True to allow concurrent requests
-    app.run(host="0.0.0.0", port=args.port, threaded=True)
-
-
-if __name__ == "__main__":
-    main()
-
+import argparse
+import itertools
+import multiprocessing
+import re
+import socket
+import time
+from flask import Flask, Response, g, jsonify, request
+from werkzeug.serving import make_server
+from counter_inmemory import InMemoryCounter
+from counter_striped import StripedInMemoryCounter
+from counter_file import FileCounter
+from counter_postgres import PostgresCounter
+from counter_postgres_sharded import ShardedPostgresCounter
+from pg_pool import DURABILITY_LEVELS, DURABILITY_SCOPES
+from counter_hazelcast import HazelcastCounter, MODES as HAZELCAST_MODES
+from counter_hazelcast_crdt import HazelcastCrdtCounter
+from counter_shared import SharedMemoryCounter
+from counter_wal import WalFileCounter, FSYNC_POLICIES
+from counter_mmap import MmapFileCounter
+from counter_cache import ReadCache
+from metrics import (REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT,
+                     TimedLock, instrument_counter)
+
+app = Flask(__name__)
+counter = None
+read_cache = None
+
+TRUE_VALUES = ("1", "true", "yes")
+COUNTER_NAME = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+# Names that collide with fixed routes (/inc/batch)
+RESERVED_NAMES = {"batch"}
+
+
+def parse_amount(raw):
+    """Positive integer increment, or None if invalid"""
+    if isinstance(raw, bool):
+        return None
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return n if n >= 1 else None
+
+
+@app.before_request
+def start_timer():
+    g.metrics_start = time.perf_counter()
+    HTTP_IN_FLIGHT.add()
+
+
+@app.after_request
+def record_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def record_request(exc=None):
+    # Runs for every request, including ones that raised
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return
+    route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    HTTP_LATENCY.observe(time.perf_counter() - start, (route,))
+    HTTP_REQUESTS.inc((request.method, route, str(g.pop("metrics_status", 500))))
+    HTTP_IN_FLIGHT.add(amount=-1)
+
+
+@app.route("/inc", methods=["POST", "GET"])
+def inc():
+    """Increment the counter (?by=N adds N in one backend call)"""
+    by = request.args.get("by")
+    if by is None:
+        new = counter.increment()
+    else:
+        n = parse_amount(by)
+        if n is None:
+            return jsonify({"error": "'by' must be a positive integer"}), 400
+        new = counter.increment_by(n)
+    if read_cache is not None:
+        read_cache.observe(new)
+    return jsonify({"value": new}), 200
+
+
+@app.route("/inc/batch", methods=["POST"])
+def inc_batch():
+    """Apply many increments in one request: {"increments": [1, 5, 2]}"""
+    body = request.get_json(silent=True) or {}
+    increments = body.get("increments")
+    amounts = [parse_amount(x) for x in increments] if isinstance(increments, list) else []
+    if not amounts or None in amounts:
+        return jsonify({"error": "'increments' must be a non-empty list of positive integers"}), 400
+
+    total = sum(amounts)
+    last = counter.increment_by(total)
+    if read_cache is not None:
+        read_cache.observe(last)
+    if not getattr(counter, "sequential", True):
+        # Sharded/striped/CRDT totals are not sequence positions: no range to carve
+        return jsonify({"value": last, "count": len(amounts)}), 200
+    first = last - total + 1
+    # Post-increment value of each entry, carved out of the committed range
+    values = list(itertools.accumulate(amounts, initial=first - 1))[1:]
+    return jsonify({"value": last, "range": [first, last], "values": values}), 200
+
+
+@app.route("/inc/<name>", methods=["POST", "GET"])
+def inc_named(name):
+    """Increment a named counter (?by=N supported; "batch" is reserved)"""
+    if not hasattr(counter, "increment_named"):
+        return jsonify({"error": "Backend does not support named counters"}), 501
+    if name in RESERVED_NAMES:
+        # GET /inc/batch lands here; the batch route only accepts POST
+        return jsonify({"error": "Method not allowed"}), 405
+    if not COUNTER_NAME.match(name):
+        return jsonify({"error": "Invalid counter name"}), 400
+    n = parse_amount(request.args.get("by", 1))
+    if n is None:
+        return jsonify({"error": "'by' must be a positive integer"}), 400
+    return jsonify({"name": name, "value": counter.increment_named(name, n)}), 200
+
+
+@app.route("/count/<name>", methods=["GET"])
+def count_named(name):
+    """Return a named counter's value"""
+    if not hasattr(counter, "get_named"):
+        return jsonify({"error": "Backend does not support named counters"}), 501
+    if name in RESERVED_NAMES or not COUNTER_NAME.match(name):
+        return jsonify({"error": "Invalid counter name"}), 400
+    return jsonify({"name": name, "value": counter.get_named(name)}), 200
+
+
+@app.route("/count", methods=["GET"])
+def count():
+    """Return current counter value (?strict=1 bypasses the read cache)"""
+    if read_cache is None:
+        return jsonify({"value": counter.get()}), 200
+    strict = request.args.get("strict", "").lower() in TRUE_VALUES
+    return jsonify({"value": read_cache.get(counter.get, strict=strict)}), 200
+
+
+@app.route("/reset", methods=["POST"])
+def reset():
+    """
+    Reset counter to 0 in place (useful for testing)
+
+    Every backend resets atomically with respect to concurrent increments
+    and returns a new epoch, so clients can tell runs apart.
+    """
+    epoch = counter.reset()
+    if read_cache is not None:
+        read_cache.invalidate()
+    return jsonify({"message": "Counter reset", "value": counter.get(), "epoch": epoch}), 200
+
+
+@app.route("/stats", methods=["GET"])
+def stats():
+    """Backend internals (e.g. connection pool utilization, read cache hit ratio)"""
+    result = counter.stats() if hasattr(counter, "stats") else {}
+    if read_cache is not None:
+        result["read_cache"] = read_cache.stats()
+    return jsonify(result), 200
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus metrics: request counts/latency, backend call latency, lock waits"""
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+def create_counter(args):
+    """Build the counter backend selected on the command line"""
+    if args.backend == "inmemory":
+        print(f"Using in-memory backend")
+        return InMemoryCounter(lock=TimedLock("inmemory"))
+    elif args.backend == "inmemory-striped":
+        mode = "exact sequence" if args.striped_exact else "per-thread cells"
+        print(f"Using striped in-memory backend ({mode}, {args.stripes or 'auto'} stripes)")
+        return StripedInMemoryCounter(
+            stripes=args.stripes,
+            exact=args.striped_exact,
+            lock_factory=lambda: TimedLock("inmemory-striped")
+        )
+    elif args.backend == "file":
+        print(f"Using file backend (file={args.file})")
+        return FileCounter(file_path=args.file, lock=TimedLock("file"))
+    elif args.backend == "mmap":
+        print(f"Using mmap file backend (file={args.mmap_file}, msync every {args.mmap_sync_every or 'kernel'})")
+        return MmapFileCounter(file_path=args.mmap_file, msync_every=args.mmap_sync_every)
+    elif args.backend == "wal":
+        print(f"Using WAL file backend (dir={args.wal_dir}, fsync={args.wal_fsync})")
+        return WalFileCounter(
+            wal_dir=args.wal_dir,
+            fsync=args.wal_fsync,
+            fsync_interval_ms=args.wal_fsync_interval_ms,
+            compact_every=args.wal_compact_every
+        )
+    elif args.backend == "postgres":
+        mode = "group commit" if args.group_commit else "atomic in-place update"
+        print(f"Using PostgreSQL backend ({mode}, pooled connections, "
+              f"durability={args.pg_durability or 'env/strict'} per {args.pg_durability_scope or 'session'})")
+        return PostgresCounter(
+            pool_min=args.pool_min,
+            pool_max=args.pool_max,
+            group_commit=args.group_commit,
+            group_window_ms=args.group_window_ms,
+            group_max=args.group_max,
+            durability=args.pg_durability,
+            durability_scope=args.pg_durability_scope
+        )
+    elif args.backend == "postgres-sharded":
+        print(f"Using PostgreSQL backend (sharded counter rows)")
+        return ShardedPostgresCounter(
+            shards=args.shards,
+            pool_min=args.pool_min,
+            pool_max=args.pool_max,
+            durability=args.pg_durability,
+            durability_scope=args.pg_durability_scope
+        )
+    elif args.backend == "hazelcast":
+        print(f"Using Hazelcast backend (CP Subsystem with IAtomicLong, {args.hz_mode} mode)")
+        return HazelcastCounter(
+            mode=args.hz_mode,
+            block_size=args.hz_block_size,
+            block_max=args.hz_block_max,
+            block_target_ms=args.hz_block_target_ms
+        )
+    elif args.backend == "hazelcast-crdt":
+        print(f"Using Hazelcast backend (PN-Counter CRDT, replica-local increments)")
+        return HazelcastCrdtCounter()
+
+
+def create_read_cache(args):
+    """Optional /count cache; disabled unless --read-cache-ttl-ms is set"""
+    if args.read_cache_ttl_ms > 0:
+        print(f"Read cache enabled for /count (max staleness {args.read_cache_ttl_ms} ms)")
+        return ReadCache(args.read_cache_ttl_ms)
+    return None
+
+
+def serve_worker(args, fd, shared_counter=None):
+    """Worker process: serve the shared listening socket with its own threads"""
+    global counter, read_cache
+    # Clients/pools do not survive fork, so remote backends are built per worker
+    counter = instrument_counter(
+        shared_counter if shared_counter is not None else create_counter(args), args.backend
+    )
+    read_cache = create_read_cache(args)
+    server = make_server("0.0.0.0", args.port, app, threaded=True, fd=fd)
+    server.serve_forever()
+
+
+def run_prefork(args):
+    """Bind once, fork --workers processes that all accept on the same socket"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(("0.0.0.0", args.port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+
+    shared_counter = None
+    if args.backend == "inmemory":
+        print(f"Using in-memory backend (shared memory across {args.workers} workers)")
+        shared_counter = SharedMemoryCounter()
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [
+        ctx.Process(target=serve_worker, args=(args, sock.fileno(), shared_counter), daemon=True)
+        for _ in range(args.workers)
+    ]
+    print(f"Starting {args.workers} worker processes on port {args.port}")
+    for w in workers:
+        w.start()
+    try:
+        for w in workers:
+            w.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for w in workers:
+            w.terminate()
+        if shared_counter is not None:
+            shared_counter.close()
+        sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["inmemory", "inmemory-striped", "file", "mmap", "wal", "postgres", "postgres-sharded", "hazelcast", "hazelcast-crdt"], default="inmemory")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--stripes", type=int, default=None,
+                        help="inmemory-striped backend: number of cells (default: 2 x CPU count)")
+    parser.add_argument("--striped-exact", action="store_true",
+                        help="inmemory-striped backend: /inc returns an exact, gap-free sequence number")
+    parser.add_argument("--file", default="/data/counter.txt")
+    parser.add_argument("--mmap-file", default="/data/counter.bin", help="mmap backend: 8-byte counter file")
+    parser.add_argument("--mmap-sync-every", type=int, default=0,
+                        help="mmap backend: msync after this many increments (0 = leave to the kernel)")
+    parser.add_argument("--wal-dir", default="/data/wal", help="WAL backend: log + snapshot directory")
+    parser.add_argument("--wal-fsync", choices=FSYNC_POLICIES, default="every", help="WAL backend: fsync policy")
+    parser.add_argument("--wal-fsync-interval-ms", type=float, default=10.0, help="WAL backend: interval fsync period")
+    parser.add_argument("--wal-compact-every", type=int, default=100000,
+                        help="WAL backend: compact the log into a snapshot after this many records")
+    parser.add_argument("--read-cache-ttl-ms", type=float, default=0,
+                        help="Serve /count from a local cache at most this old (0 = disabled)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Pre-forked worker processes (in-memory backend uses a shared-memory counter)")
+    parser.add_argument("--pool-min", type=int, default=None, help="PostgreSQL pool min size")
+    parser.add_argument("--pool-max", type=int, default=None, help="PostgreSQL pool max size")
+    parser.add_argument("--group-commit", action="store_true",
+                        help="PostgreSQL: coalesce concurrent increments into one UPDATE/commit")
+    parser.add_argument("--group-window-ms", type=float, default=2.0, help="Group commit batching window")
+    parser.add_argument("--group-max", type=int, default=64, help="Max increments per group commit")
+    parser.add_argument("--shards", type=int, default=None, help="PostgreSQL sharded backend: number of slot rows")
+    parser.add_argument("--pg-durability", choices=list(DURABILITY_LEVELS), default=None,
+                        help="PostgreSQL: strict (synchronous_commit=on), local, or async (off)")
+    parser.add_argument("--pg-durability-scope", choices=DURABILITY_SCOPES, default=None,
+                        help="PostgreSQL: apply the durability tier per session or per write transaction")
+    parser.add_argument("--hz-mode", choices=HAZELCAST_MODES, default="strict",
+                        help="Hazelcast: strict = one CP round trip per increment, block = reserve value ranges")
+    parser.add_argument("--hz-block-size", type=int, default=0,
+                        help="Hazelcast block mode: fixed block size (0 = adapt to the request rate)")
+    parser.add_argument("--hz-block-max", type=int, default=65536, help="Hazelcast block mode: max adaptive block size")
+    parser.add_argument("--hz-block-target-ms", type=float, default=1000.0,
+                        help="Hazelcast block mode: adaptive blocks last about this long")
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        if args.backend in ("file", "wal", "inmemory-striped"):
+            parser.error(f"{args.backend} backend only supports --workers 1 (its lock is per process)")
+        run_prefork(args)
+        return
+
+    global counter, read_cache
+    counter = instrument_counter(create_counter(args), args.backend)
+    read_cache = create_read_cache(args)
+
+    print(f"Starting server on port {args.port}")
+    # threaded=True to allow concurrent requests
+    app.run(host="0.0.0.0", port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
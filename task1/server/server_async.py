@@ -0,0 +1,133 @@
+"""
+Asyncio web counter server (aiohttp).
+
+Same /inc, /count and /reset API as server.py, but requests are served
+by a single event loop instead of one OS thread per in-flight request.
+"""
+import argparse
+import itertools
+from aiohttp import web
+from counter_async import (
+    AsyncInMemoryCounter,
+    AsyncFileCounter,
+    AsyncPostgresCounter,
+    AsyncHazelcastCounter,
+)
+
+COUNTER = web.AppKey("counter", object)
+
+
+def parse_amount(raw):
+    """Positive integer increment, or None if invalid"""
+    if isinstance(raw, bool):
+        return None
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return n if n >= 1 else None
+
+
+async def inc(request: web.Request) -> web.Response:
+    """Increment the counter (?by=N adds N in one backend call)"""
+    counter = request.app[COUNTER]
+    by = request.query.get("by")
+    if by is None:
+        new = await counter.increment()
+    else:
+        n = parse_amount(by)
+        if n is None:
+            return web.json_response({"error": "'by' must be a positive integer"}, status=400)
+        new = await counter.increment_by(n)
+    return web.json_response({"value": new})
+
+
+async def inc_batch(request: web.Request) -> web.Response:
+    """Apply many increments in one request: {"increments": [1, 5, 2]}"""
+    try:
+        body = await request.json()
+    except ValueError:
+        body = {}
+    increments = body.get("increments") if isinstance(body, dict) else None
+    amounts = [parse_amount(x) for x in increments] if isinstance(increments, list) else []
+    if not amounts or None in amounts:
+        return web.json_response(
+            {"error": "'increments' must be a non-empty list of positive integers"}, status=400
+        )
+
+    total = sum(amounts)
+    last = await request.app[COUNTER].increment_by(total)
+    first = last - total + 1
+    values = list(itertools.accumulate(amounts, initial=first - 1))[1:]
+    return web.json_response({"value": last, "range": [first, last], "values": values})
+
+
+async def count(request: web.Request) -> web.Response:
+    """Return current counter value"""
+    return web.json_response({"value": await request.app[COUNTER].get()})
+
+
+async def reset(request: web.Request) -> web.Response:
+    """Reset counter to 0 (useful for testing)"""
+    counter = request.app[COUNTER]
+    epoch = await counter.reset()
+    return web.json_response({"message": "Counter reset", "value": await counter.get(), "epoch": epoch})
+
+
+async def stats(request: web.Request) -> web.Response:
+    """Backend internals (e.g. connection pool utilization)"""
+    counter = request.app[COUNTER]
+    return web.json_response(counter.stats() if hasattr(counter, "stats") else {})
+
+
+def create_app(args) -> web.Application:
+    app = web.Application()
+
+    async def open_backend(app):
+        if args.backend == "inmemory":
+            print(f"Using in-memory backend (asyncio)")
+            app[COUNTER] = AsyncInMemoryCounter()
+        elif args.backend == "file":
+            print(f"Using file backend (asyncio, file={args.file})")
+            app[COUNTER] = AsyncFileCounter(file_path=args.file)
+        elif args.backend == "postgres":
+            print(f"Using PostgreSQL backend (asyncpg pool)")
+            app[COUNTER] = await AsyncPostgresCounter.create(
+                pool_min=args.pool_min, pool_max=args.pool_max, durability=args.pg_durability
+            )
+        elif args.backend == "hazelcast":
+            print(f"Using Hazelcast backend (IAtomicLong, non-blocking futures)")
+            app[COUNTER] = AsyncHazelcastCounter()
+
+    async def close_backend(app):
+        await app[COUNTER].close()
+
+    app.on_startup.append(open_backend)
+    app.on_cleanup.append(close_backend)
+
+    app.router.add_route("POST", "/inc", inc)
+    app.router.add_route("GET", "/inc", inc)
+    app.router.add_post("/inc/batch", inc_batch)
+    app.router.add_get("/count", count)
+    app.router.add_post("/reset", reset)
+    app.router.add_get("/stats", stats)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["inmemory", "file", "postgres", "hazelcast"], default="inmemory")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--file", default="/data/counter.txt")
+    parser.add_argument("--pool-min", type=int, default=None, help="PostgreSQL pool min size")
+    parser.add_argument("--pool-max", type=int, default=None, help="PostgreSQL pool max size")
+    parser.add_argument("--pg-durability", choices=["strict", "local", "async"], default=None,
+                        help="PostgreSQL: synchronous_commit on / local / off for every session")
+    args = parser.parse_args()
+
+    print(f"Starting asyncio server on port {args.port}")
+    web.run_app(create_app(args), host="0.0.0.0", port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
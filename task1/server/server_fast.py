@@ -0,0 +1,265 @@
+"""
+Lean HTTP/1.1 counter server (in-memory backend).
+
+Flask/Werkzeug spend far more time on routing, request objects and
+jsonify than the in-memory counter needs for an increment. This server
+serves the same routes straight from an asyncio.Protocol: requests are
+parsed with a few bytes operations, keep-alive and pipelined requests are
+handled on one connection, and responses are filled into pre-encoded
+byte templates. uvloop is used when installed.
+
+Usage:
+    python server_fast.py --port 8080
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import re
+from urllib.parse import parse_qs, unquote
+
+from counter_inmemory import InMemoryCounter
+
+MAX_HEADER_BYTES = 65536
+MAX_BODY_BYTES = 1 << 20
+COUNTER_NAME = re.compile(r"^[A-Za-z0-9_.:-]{1,64}$")
+# Names that collide with fixed routes (/inc/batch)
+RESERVED_NAMES = {"batch"}
+
+_REASONS = {200: b"OK", 400: b"Bad Request", 404: b"Not Found", 405: b"Method Not Allowed",
+            411: b"Length Required", 413: b"Payload Too Large", 431: b"Request Header Fields Too Large"}
+
+
+def _template(status: int, close: bool = False) -> bytes:
+    """Status line and headers up to the Content-Length value"""
+    return (b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\n%sContent-Length: "
+            % (status, _REASONS[status], b"Connection: close\r\n" if close else b""))
+
+
+_HEAD = {(status, close): _template(status, close) for status in _REASONS for close in (False, True)}
+_VALUE_BODY = b'{"value":%d}'
+
+
+def response(status: int, body: bytes, close: bool = False) -> bytes:
+    return b"%s%d\r\n\r\n%s" % (_HEAD[status, close], len(body), body)
+
+
+def json_response(status: int, obj, close: bool = False) -> bytes:
+    return response(status, json.dumps(obj, separators=(",", ":")).encode(), close)
+
+
+def error(status: int, message: str, close: bool = False) -> bytes:
+    return json_response(status, {"error": message}, close)
+
+
+def parse_amount(raw):
+    """Positive integer increment, or None if invalid"""
+    if isinstance(raw, bool):
+        return None
+    try:
+        n = int(raw)
+    except (TypeError, ValueError):
+        return None
+    return n if n >= 1 else None
+
+
+class CounterApp:
+    """Route table over one counter; every handler returns complete response bytes."""
+
+    def __init__(self, counter):
+        self.counter = counter
+
+    def handle(self, method: bytes, target: bytes, body: bytes) -> bytes:
+        path, _, query = target.partition(b"?")
+        # Hot path: plain /inc without parameters
+        if path == b"/inc" and not query:
+            if method not in (b"GET", b"POST"):
+                return error(405, "Method not allowed")
+            return response(200, _VALUE_BODY % self.counter.increment())
+
+        path = unquote(path.decode("latin-1"))
+        args = {k: v[-1] for k, v in parse_qs(query.decode("latin-1")).items()} if query else {}
+        if path == "/inc":
+            if method not in (b"GET", b"POST"):
+                return error(405, "Method not allowed")
+            n = parse_amount(args.get("by"))
+            if n is None:
+                return error(400, "'by' must be a positive integer")
+            return response(200, _VALUE_BODY % self.counter.increment_by(n))
+        if path == "/count":
+            if method != b"GET":
+                return error(405, "Method not allowed")
+            return response(200, _VALUE_BODY % self.counter.get())
+        if path == "/inc/batch":
+            if method != b"POST":
+                return error(405, "Method not allowed")
+            return self.inc_batch(body)
+        if path == "/reset":
+            if method != b"POST":
+                return error(405, "Method not allowed")
+            epoch = self.counter.reset()
+            return json_response(200, {"message": "Counter reset", "value": self.counter.get(), "epoch": epoch})
+        if path == "/stats":
+            return json_response(200, {"server": "fast", "epoch": self.counter.epoch})
+        if path.startswith("/inc/") or path.startswith("/count/"):
+            return self.named(method, path, args)
+        return error(404, "Not found")
+
+    def inc_batch(self, body: bytes) -> bytes:
+        """Apply many increments in one request: {"increments": [1, 5, 2]}"""
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            data = {}
+        increments = data.get("increments") if isinstance(data, dict) else None
+        amounts = [parse_amount(x) for x in increments] if isinstance(increments, list) else []
+        if not amounts or None in amounts:
+            return error(400, "'increments' must be a non-empty list of positive integers")
+
+        total = sum(amounts)
+        last = self.counter.increment_by(total)
+        first = last - total + 1
+        values = list(itertools.accumulate(amounts, initial=first - 1))[1:]
+        return json_response(200, {"value": last, "range": [first, last], "values": values})
+
+    def named(self, method: bytes, path: str, args: dict) -> bytes:
+        """/inc/<name> (GET or POST, ?by=N) and /count/<name> (GET)"""
+        route, _, name = path[1:].partition("/")
+        if name in RESERVED_NAMES or not COUNTER_NAME.match(name):
+            return error(400, "Invalid counter name")
+        if route == "count":
+            if method != b"GET":
+                return error(405, "Method not allowed")
+            return json_response(200, {"name": name, "value": self.counter.get_named(name)})
+        if method not in (b"GET", b"POST"):
+            return error(405, "Method not allowed")
+        n = parse_amount(args.get("by", 1))
+        if n is None:
+            return error(400, "'by' must be a positive integer")
+        return json_response(200, {"name": name, "value": self.counter.increment_named(name, n)})
+
+
+class HttpProtocol(asyncio.Protocol):
+    """
+    Minimal HTTP/1.1 connection handler.
+
+    Every complete request in the read buffer is answered in order, and
+    all responses produced by one read go out in a single write, so
+    pipelined clients cost one syscall per batch. Chunked request bodies
+    are not supported (411).
+    """
+
+    def __init__(self, app: CounterApp):
+        self.app = app
+        self.transport = None
+        self.buffer = b""
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def pause_writing(self):
+        # Client is not reading its responses: stop reading new requests
+        self.transport.pause_reading()
+
+    def resume_writing(self):
+        self.transport.resume_reading()
+
+    def data_received(self, data: bytes):
+        buffer = self.buffer + data if self.buffer else data
+        out = []
+        close = False
+        while True:
+            end = buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(buffer) > MAX_HEADER_BYTES:
+                    out.append(error(431, "Request headers too large", close=True))
+                    close = True
+                break
+            head = buffer[:end]
+            request_line, _, header_block = head.partition(b"\r\n")
+            parts = request_line.split(b" ")
+            if len(parts) != 3:
+                out.append(error(400, "Malformed request line", close=True))
+                close = True
+                break
+            method, target, version = parts
+
+            length = 0
+            keep_alive = version == b"HTTP/1.1"
+            if header_block:
+                for line in header_block.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    name = name.strip().lower()
+                    if name == b"content-length":
+                        length = int(value) if value.strip().isdigit() else -1
+                    elif name == b"connection":
+                        token = value.strip().lower()
+                        keep_alive = token == b"keep-alive" if version != b"HTTP/1.1" else token != b"close"
+                    elif name == b"transfer-encoding":
+                        length = -2
+            if length == -2:
+                out.append(error(411, "Chunked request bodies are not supported", close=True))
+                close = True
+                break
+            if length < 0 or length > MAX_BODY_BYTES:
+                out.append(error(413 if length > 0 else 400, "Invalid Content-Length", close=True))
+                close = True
+                break
+
+            start = end + 4
+            if len(buffer) - start < length:
+                break                           # wait for the rest of the body
+            body = buffer[start:start + length]
+            buffer = buffer[start + length:]
+
+            result = self.app.handle(method, target, body)
+            if not keep_alive:
+                out.append(result.replace(b"Content-Length", b"Connection: close\r\nContent-Length", 1))
+                close = True
+                break
+            out.append(result)
+
+        self.buffer = b"" if close else buffer
+        if out:
+            self.transport.write(b"".join(out) if len(out) > 1 else out[0])
+        if close:
+            self.transport.close()
+
+    def connection_lost(self, exc):
+        self.buffer = b""
+
+
+def install_uvloop() -> bool:
+    """Use uvloop's event loop when the package is installed."""
+    try:
+        import uvloop
+    except ImportError:
+        return False
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+async def serve(port: int, app: CounterApp):
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(lambda: HttpProtocol(app), "0.0.0.0", port, backlog=1024)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lean HTTP/1.1 counter server (in-memory backend)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--no-uvloop", action="store_true", help="Use the stdlib event loop even if uvloop is installed")
+    args = parser.parse_args()
+
+    uvloop_enabled = not args.no_uvloop and install_uvloop()
+    print(f"Using in-memory backend ({'uvloop' if uvloop_enabled else 'asyncio'} event loop)")
+    print(f"Starting lean server on port {args.port}")
+    try:
+        asyncio.run(serve(args.port, CounterApp(InMemoryCounter())))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
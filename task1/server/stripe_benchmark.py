@@ -0,0 +1,86 @@
+"""
+Striped vs. single-lock in-memory counter benchmark.
+
+Calls increment() directly from 1-64 threads (no HTTP), so the numbers
+show lock contention only. On a GIL build the interpreter lock caps the
+gain; on a free-threaded build (python3.13t and later) the single lock
+is the bottleneck and the striped counter keeps scaling.
+
+Usage:
+    python stripe_benchmark.py --threads 1,2,4,8,16,32,64 --iterations 20000
+"""
+import argparse
+import sys
+import threading
+import time
+
+from counter_inmemory import InMemoryCounter
+from counter_striped import StripedInMemoryCounter
+
+COUNTERS = {
+    "single-lock": InMemoryCounter,
+    "striped": StripedInMemoryCounter,
+    "striped-exact": lambda: StripedInMemoryCounter(exact=True),
+}
+
+
+def run(counter, num_threads: int, iterations: int) -> float:
+    """Increment from num_threads threads at once; returns elapsed seconds."""
+    start_barrier = threading.Barrier(num_threads + 1)
+
+    def worker():
+        increment = counter.increment
+        start_barrier.wait()
+        for _ in range(iterations):
+            increment()
+
+    threads = [threading.Thread(target=worker) for _ in range(num_threads)]
+    for t in threads:
+        t.start()
+    start_barrier.wait()
+    start_time = time.perf_counter()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-memory counter throughput vs. thread count")
+    parser.add_argument("--threads", default="1,2,4,8,16,32,64", help="Comma-separated thread counts")
+    parser.add_argument("--iterations", type=int, default=20000, help="Increments per thread")
+    parser.add_argument("--counters", default=",".join(COUNTERS), help=f"Comma-separated: {','.join(COUNTERS)}")
+    args = parser.parse_args()
+
+    thread_counts = [int(t) for t in args.threads.split(",") if t]
+    names = [c for c in args.counters.split(",") if c]
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+
+    print("\n" + "="*60)
+    print("Striped In-Memory Counter Benchmark")
+    print("="*60)
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+
+    results = {}
+    for name in names:
+        for num_threads in thread_counts:
+            counter = COUNTERS[name]()
+            elapsed = run(counter, num_threads, args.iterations)
+            expected = num_threads * args.iterations
+            results[name, num_threads] = (expected / elapsed if elapsed > 0 else 0, counter.get() == expected)
+
+    print("\n" + "="*60)
+    print("THROUGHPUT (ops/s) VS THREADS")
+    print("="*60)
+    print(f"{'Threads':<10}" + "".join(f"{name:<18}" for name in names))
+    print("-"*60)
+    for num_threads in thread_counts:
+        row = ""
+        for name in names:
+            throughput, correct = results[name, num_threads]
+            row += f"{throughput:<12.0f} {'✓' if correct else '✗':<5}"
+        print(f"{num_threads:<10}{row}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
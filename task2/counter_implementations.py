@@ -1,324 +1,550 @@
-import psycopg2
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable
-
-
-class DatabaseConfig:
-    """Database connection configuration"""
-    def __init__(self, host="postgres", port=5432, database="counter_db",
-                 user="postgres", password="postgres"):
-        self.host = host
-        self.port = port
-        self.database = database
-        self.user = user
-        self.password = password
-
-    def get_connection(self):
-        """Create a new database connection"""
-        return psycopg2.connect(
-            host=self.host,
-            port=self.port,
-            database=self.database,
-            user=self.user,
-            password=self.password
-        )
-
-
-def reset_counter(db_config: DatabaseConfig):
-    """Reset counter to 0"""
-    conn = db_config.get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("UPDATE user_counter SET counter = 0, version = 0 WHERE user_id = 1")
-        conn.commit()
-        print("Counter reset to 0")
-    finally:
-        conn.close()
-
-
-def get_counter_value(db_config: DatabaseConfig) -> int:
-    """Get current counter value"""
-    conn = db_config.get_connection()
-    try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT counter FROM user_counter WHERE user_id = 1")
-        result = cursor.fetchone()
-        return result[0] if result else 0
-    finally:
-        conn.close()
-
-
-# ============================================================
-# VARIANT 1: Lost Update (will lose updates!)
-# ============================================================
-
-def lost_update_worker(db_config: DatabaseConfig, iterations: int):
-    """Worker for lost update variant - NOT thread-safe!"""
-    conn = db_config.get_connection()
-    try:
-        cursor = conn.cursor()
-        for i in range(iterations):
-            # Read current value
-            cursor.execute("SELECT counter FROM user_counter WHERE user_id = 1")
-            counter = cursor.fetchone()[0]
-
-            # Increment
-            counter = counter + 1
-
-            # Write back (RACE CONDITION HERE!)
-            cursor.execute("UPDATE user_counter SET counter = %s WHERE user_id = 1", (counter,))
-            conn.commit()
-    finally:
-        conn.close()
-
-
-# ============================================================
-# VARIANT 2: Serializable Isolation Level
-# ============================================================
-
-def serializable_worker(db_config: DatabaseConfig, iterations: int):
-    """Worker with SERIALIZABLE isolation level"""
-    conn = db_config.get_connection()
-    try:
-        for i in range(iterations):
-            while True:
-                try:
-                    # Set isolation level to SERIALIZABLE
-                    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_SERIALIZABLE)
-                    cursor = conn.cursor()
-
-                    # Read current value
-                    cursor.execute("SELECT counter FROM user_counter WHERE user_id = 1")
-                    counter = cursor.fetchone()[0]
-
-                    # Increment
-                    counter = counter + 1
-
-                    # Write back
-                    cursor.execute("UPDATE user_counter SET counter = %s WHERE user_id = 1", (counter,))
-                    conn.commit()
-                    break  # Success, exit retry loop
-
-                except psycopg2.extensions.TransactionRollbackError:
-                    # Serialization failure - retry
-                    conn.rollback()
-                    continue
-    finally:
-        conn.close()
-
-
-# ============================================================
-# VARIANT 3: In-place Update (atomic increment)
-# ============================================================
-
-def inplace_update_worker(db_config: DatabaseConfig, iterations: int):
-    """Worker with in-place atomic update - thread-safe!"""
-    conn = db_config.get_connection()
-    try:
-        cursor = conn.cursor()
-        for i in range(iterations):
-            # Atomic increment
-            cursor.execute("UPDATE user_counter SET counter = counter + 1 WHERE user_id = 1")
-            conn.commit()
-    finally:
-        conn.close()
-
-
-# ============================================================
-# VARIANT 4: Row-level Locking (SELECT ... FOR UPDATE)
-# ============================================================
-
-def row_locking_worker(db_config: DatabaseConfig, iterations: int):
-    """Worker with row-level locking using FOR UPDATE"""
-    conn = db_config.get_connection()
-    try:
-        for i in range(iterations):
-            cursor = conn.cursor()
-
-            # Lock the row for update
-            cursor.execute("SELECT counter FROM user_counter WHERE user_id = 1 FOR UPDATE")
-            counter = cursor.fetchone()[0]
-
-            # Increment
-            counter = counter + 1
-
-            # Write back
-            cursor.execute("UPDATE user_counter SET counter = %s WHERE user_id = 1", (counter,))
-            conn.commit()
-    finally:
-        conn.close()
-
-
-# ============================================================
-# VARIANT 5: Optimistic Concurrency Control
-# ============================================================
-
-def optimistic_locking_worker(db_config: DatabaseConfig, iterations: int):
-    """Worker with optimistic locking using version field"""
-    conn = db_config.get_connection()
-    try:
-        cursor = conn.cursor()
-        for i in range(iterations):
-            while True:
-                # Read current value and version
-                cursor.execute("SELECT counter, version FROM user_counter WHERE user_id = 1")
-                counter, version = cursor.fetchone()
-
-                # Increment
-                counter = counter + 1
-
-                # Try to update with version check
-                cursor.execute(
-                    "UPDATE user_counter SET counter = %s, version = %s WHERE user_id = %s AND version = %s",
-                    (counter, version + 1, 1, version)
-                )
-                conn.commit()
-
-                # Check if update was successful
-                if cursor.rowcount > 0:
-                    break  # Success, exit retry loop
-                # Otherwise, retry with new version
-    finally:
-        conn.close()
-
-
-# ============================================================
-# Test Runner
-# ============================================================
-
-def run_test(name: str, worker_func: Callable, db_config: DatabaseConfig,
-             num_threads: int = 10, iterations_per_thread: int = 10000):
-    """Run a concurrent test with specified worker function"""
-
-    print(f"\n{'='*60}")
-    print(f"TEST: {name}")
-    print(f"{'='*60}")
-    print(f"Threads: {num_threads}")
-    print(f"Iterations per thread: {iterations_per_thread}")
-    print(f"Expected final count: {num_threads * iterations_per_thread}")
-    print()
-
-    # Reset counter
-    reset_counter(db_config)
-
-    # Run concurrent workers
-    start_time = time.perf_counter()
-
-    with ThreadPoolExecutor(max_workers=num_threads) as executor:
-        futures = [
-            executor.submit(worker_func, db_config, iterations_per_thread)
-            for _ in range(num_threads)
-        ]
-
-        # Wait for all to complete
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                print(f"Worker error: {e}")
-
-    end_time = time.perf_counter()
-    elapsed = end_time - start_time
-
-    # Get final counter value
-    final_value = get_counter_value(db_config)
-    expected_value = num_threads * iterations_per_thread
-
-    # Calculate throughput
-    throughput = (num_threads * iterations_per_thread) / elapsed if elapsed > 0 else 0
-
-    # Results
-    print(f"Results:")
-    print(f"  Final counter value: {final_value}")
-    print(f"  Expected value: {expected_value}")
-    print(f"  Lost updates: {expected_value - final_value}")
-    print(f"  Elapsed time: {elapsed:.2f} seconds")
-    print(f"  Throughput: {throughput:.2f} updates/second")
-
-    if final_value == expected_value:
-        print(f"  ✓ SUCCESS: No lost updates!")
-    else:
-        print(f"  ✗ FAILURE: Lost {expected_value - final_value} updates!")
-
-    return {
-        'name': name,
-        'final_value': final_value,
-        'expected_value': expected_value,
-        'lost_updates': expected_value - final_value,
-        'elapsed': elapsed,
-        'throughput': throughput,
-        'success': final_value == expected_value
-    }
-
-
-def main():
-    """Run all tests"""
-
-    # Database configuration
-    db_config = DatabaseConfig(
-        host="postgres",
-        port=5432,
-        database="counter_db",
-        user="postgres",
-        password="postgres"
-    )
-
-    print("\n" + "="*60)
-    print("PostgreSQL Counter Implementation Tests")
-    print("="*60)
-
-    results = []
-
-    # Test 1: Lost Update
-    results.append(run_test(
-        "1. Lost Update (NOT thread-safe)",
-        lost_update_worker,
-        db_config
-    ))
-
-    # Test 2: Serializable
-    results.append(run_test(
-        "2. Serializable Isolation Level",
-        serializable_worker,
-        db_config
-    ))
-
-    # Test 3: In-place Update
-    results.append(run_test(
-        "3. In-place Atomic Update",
-        inplace_update_worker,
-        db_config
-    ))
-
-    # Test 4: Row-level Locking
-    results.append(run_test(
-        "4. Row-level Locking (FOR UPDATE)",
-        row_locking_worker,
-        db_config
-    ))
-
-    # Test 5: Optimistic Locking
-    results.append(run_test(
-        "5. Optimistic Concurrency Control",
-        optimistic_locking_worker,
-        db_config
-    ))
-
-    # Summary
-    print("\n" + "="*60)
-    print("SUMMARY OF ALL TESTS")
-    print("="*60)
-    print(f"{'Test':<40} {'Result':<10} {'Time (s)':<12} {'Throughput (ops/s)':<20}")
-    print("-"*60)
-
-    for r in results:
-        status = "✓ PASS" if r['success'] else "✗ FAIL"
-        print(f"{r['name']:<40} {status:<10} {r['elapsed']:<12.2f} {r['throughput']:<20.2f}")
-
-    print("="*60)
-
-
-if __name__ == "__main__":
-    main()
-
+import argparse
+import psycopg2
+import itertools
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable
+
+from histogram import LatencyHistogram
+from pg_pool import DURABILITY_LEVELS, DURABILITY_SCOPES, synchronous_commit_sql
+from retry import RetryPolicy, MODES as RETRY_MODES
+
+
+class DatabaseConfig:
+    """
+    Database connection configuration
+
+    durability picks synchronous_commit (strict = on, local, async = off);
+    durability_scope applies it once per connection ("session") or with
+    SET LOCAL at the start of every transaction ("transaction").
+    """
+    def __init__(self, host="postgres", port=5432, database="counter_db",
+                 user="postgres", password="postgres",
+                 durability="strict", durability_scope="session"):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.durability = durability
+        self.durability_scope = durability_scope
+        setting = synchronous_commit_sql(durability, durability_scope)
+        self._session_setup = setting if durability_scope == "session" else None
+        # Sent in the same round trip as a transaction's first statement
+        self.txn_prefix = setting + "; " if durability_scope == "transaction" else ""
+
+        self._shared = None
+
+    def get_connection(self):
+        """Create a new database connection"""
+        conn = psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password
+        )
+        if self._session_setup is not None:
+            with conn.cursor() as cursor:
+                cursor.execute(self._session_setup)
+            conn.commit()
+        return conn
+
+    def get_shared_connection(self):
+        """Long-lived connection reused by the reset/read helpers (main thread only)"""
+        if self._shared is None or self._shared.closed:
+            self._shared = self.get_connection()
+        return self._shared
+
+
+class Statements:
+    """
+    Hot-path SQL of one worker connection.
+
+    With prepared=True every statement is PREPAREd once and run with EXECUTE,
+    so PostgreSQL parses and plans it once per connection instead of on every
+    iteration. Statement names must be unique per connection. txn_prefix
+    (e.g. SET LOCAL synchronous_commit) is prepended to the first statement
+    of each transaction.
+    """
+    def __init__(self, conn, prepared: bool, txn_prefix: str = "", **statements):
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.txn_prefix = txn_prefix
+        self._sql = {}
+        for name, sql in statements.items():
+            if not prepared:
+                self._sql[name] = sql
+                continue
+            params = itertools.count(1)
+            self.cursor.execute(f"PREPARE {name} AS " + re.sub("%s", lambda m: f"${next(params)}", sql))
+            arity = sql.count("%s")
+            self._sql[name] = f"EXECUTE {name}" + (f"({', '.join(['%s'] * arity)})" if arity else "")
+        if prepared:
+            conn.commit()
+
+    def execute(self, name: str, params: tuple = None):
+        sql = self._sql[name]
+        if self.txn_prefix and self.conn.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+            sql = self.txn_prefix + sql
+        self.cursor.execute(sql, params)
+
+
+def reset_counter(db_config: DatabaseConfig):
+    """Reset counter to 0"""
+    conn = db_config.get_shared_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("UPDATE user_counter SET counter = 0, version = 0 WHERE user_id = 1")
+        conn.commit()
+        print("Counter reset to 0")
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def get_counter_value(db_config: DatabaseConfig) -> int:
+    """Get current counter value"""
+    conn = db_config.get_shared_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT counter FROM user_counter WHERE user_id = 1")
+        result = cursor.fetchone()
+        return result[0] if result else 0
+    finally:
+        # End the read transaction so the connection is idle between tests
+        conn.rollback()
+
+
+# ============================================================
+# VARIANT 1: Lost Update (will lose updates!)
+# ============================================================
+
+def lost_update_worker(db_config: DatabaseConfig, iterations: int,
+                       histogram: LatencyHistogram = None, prepared: bool = False):
+    """Worker for lost update variant - NOT thread-safe!"""
+    conn = db_config.get_connection()
+    try:
+        sql = Statements(conn, prepared, db_config.txn_prefix,
+                         lost_select="SELECT counter FROM user_counter WHERE user_id = 1",
+                         lost_update="UPDATE user_counter SET counter = %s WHERE user_id = 1")
+        cursor = sql.cursor
+        for i in range(iterations):
+            t0 = time.perf_counter_ns()
+            # Read current value
+            sql.execute("lost_select")
+            counter = cursor.fetchone()[0]
+
+            # Increment
+            counter = counter + 1
+
+            # Write back (RACE CONDITION HERE!)
+            sql.execute("lost_update", (counter,))
+            conn.commit()
+            if histogram is not None:
+                histogram.record((time.perf_counter_ns() - t0) // 1000)
+    finally:
+        conn.close()
+
+
+# ============================================================
+# VARIANT 2: Serializable Isolation Level
+# ============================================================
+
+def serializable_worker(db_config: DatabaseConfig, iterations: int,
+                        histogram: LatencyHistogram = None, retry_policy: RetryPolicy = None,
+                        prepared: bool = False):
+    """Worker with SERIALIZABLE isolation level"""
+    retry_policy = retry_policy or RetryPolicy("none")
+    conn = db_config.get_connection()
+    try:
+        # Set isolation level to SERIALIZABLE
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_SERIALIZABLE)
+        sql = Statements(conn, prepared, db_config.txn_prefix,
+                         ser_select="SELECT counter FROM user_counter WHERE user_id = 1",
+                         ser_update="UPDATE user_counter SET counter = %s WHERE user_id = 1")
+        cursor = sql.cursor
+
+        def increment():
+            # Read current value
+            sql.execute("ser_select")
+            counter = cursor.fetchone()[0]
+
+            # Increment
+            counter = counter + 1
+
+            # Write back
+            sql.execute("ser_update", (counter,))
+            conn.commit()
+            return True
+
+        for i in range(iterations):
+            # Latency includes every retry of this increment
+            t0 = time.perf_counter_ns()
+            # Serialization failure - roll back, back off and retry
+            retry_policy.run(increment, retry_on=(psycopg2.extensions.TransactionRollbackError,),
+                             on_abort=conn.rollback)
+            if histogram is not None:
+                histogram.record((time.perf_counter_ns() - t0) // 1000)
+    finally:
+        conn.close()
+
+
+# ============================================================
+# VARIANT 3: In-place Update (atomic increment)
+# ============================================================
+
+def inplace_update_worker(db_config: DatabaseConfig, iterations: int,
+                          histogram: LatencyHistogram = None, prepared: bool = False):
+    """Worker with in-place atomic update - thread-safe!"""
+    conn = db_config.get_connection()
+    try:
+        sql = Statements(conn, prepared, db_config.txn_prefix,
+                         inplace_update="UPDATE user_counter SET counter = counter + 1 WHERE user_id = 1")
+        for i in range(iterations):
+            t0 = time.perf_counter_ns()
+            # Atomic increment
+            sql.execute("inplace_update")
+            conn.commit()
+            if histogram is not None:
+                histogram.record((time.perf_counter_ns() - t0) // 1000)
+    finally:
+        conn.close()
+
+
+# ============================================================
+# VARIANT 4: Row-level Locking (SELECT ... FOR UPDATE)
+# ============================================================
+
+def row_locking_worker(db_config: DatabaseConfig, iterations: int,
+                       histogram: LatencyHistogram = None, prepared: bool = False):
+    """Worker with row-level locking using FOR UPDATE"""
+    conn = db_config.get_connection()
+    try:
+        sql = Statements(conn, prepared, db_config.txn_prefix,
+                         lock_select="SELECT counter FROM user_counter WHERE user_id = 1 FOR UPDATE",
+                         lock_update="UPDATE user_counter SET counter = %s WHERE user_id = 1")
+        cursor = sql.cursor
+        for i in range(iterations):
+            t0 = time.perf_counter_ns()
+
+            # Lock the row for update
+            sql.execute("lock_select")
+            counter = cursor.fetchone()[0]
+
+            # Increment
+            counter = counter + 1
+
+            # Write back
+            sql.execute("lock_update", (counter,))
+            conn.commit()
+            if histogram is not None:
+                histogram.record((time.perf_counter_ns() - t0) // 1000)
+    finally:
+        conn.close()
+
+
+# ============================================================
+# VARIANT 5: Optimistic Concurrency Control
+# ============================================================
+
+def optimistic_locking_worker(db_config: DatabaseConfig, iterations: int,
+                              histogram: LatencyHistogram = None, retry_policy: RetryPolicy = None,
+                              prepared: bool = False):
+    """Worker with optimistic locking using version field"""
+    retry_policy = retry_policy or RetryPolicy("none")
+    conn = db_config.get_connection()
+    try:
+        sql = Statements(conn, prepared, db_config.txn_prefix,
+                         occ_select="SELECT counter, version FROM user_counter WHERE user_id = 1",
+                         occ_update="UPDATE user_counter SET counter = %s, version = %s "
+                                    "WHERE user_id = %s AND version = %s")
+        cursor = sql.cursor
+
+        def increment():
+            # Read current value and version
+            sql.execute("occ_select")
+            counter, version = cursor.fetchone()
+
+            # Increment
+            counter = counter + 1
+
+            # Try to update with version check
+            sql.execute("occ_update", (counter, version + 1, 1, version))
+            conn.commit()
+
+            # Successful only if the version was unchanged; otherwise retry with new version
+            return cursor.rowcount > 0
+
+        for i in range(iterations):
+            # Latency includes every retry of this increment
+            t0 = time.perf_counter_ns()
+            retry_policy.run(increment)
+            if histogram is not None:
+                histogram.record((time.perf_counter_ns() - t0) // 1000)
+    finally:
+        conn.close()
+
+
+# ============================================================
+# VARIANT 6: Sharded (striped) counter rows
+# ============================================================
+
+def reset_sharded_counter(db_config: DatabaseConfig, shards: int):
+    """Recreate exactly `shards` zeroed slot rows for user 1"""
+    conn = db_config.get_shared_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS user_counter_shards (
+                user_id INTEGER NOT NULL,
+                slot INTEGER NOT NULL,
+                counter BIGINT NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, slot)
+            )
+        """)
+        cursor.execute("DELETE FROM user_counter_shards WHERE user_id = 1")
+        cursor.execute(
+            "INSERT INTO user_counter_shards (user_id, slot, counter) "
+            "SELECT 1, s, 0 FROM generate_series(0, %s - 1) AS s",
+            (shards,)
+        )
+        conn.commit()
+        print(f"Sharded counter reset to 0 ({shards} slots)")
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def get_sharded_counter_value(db_config: DatabaseConfig) -> int:
+    """Get current counter value as the sum of all slots"""
+    conn = db_config.get_shared_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT COALESCE(SUM(counter), 0) FROM user_counter_shards WHERE user_id = 1")
+        return int(cursor.fetchone()[0])
+    finally:
+        conn.rollback()
+
+
+def make_sharded_worker(shards: int) -> Callable:
+    """Build a worker that spreads in-place increments over `shards` slot rows"""
+    next_slot = itertools.count()
+
+    def sharded_worker(db_config: DatabaseConfig, iterations: int,
+                       histogram: LatencyHistogram = None):
+        """Worker with in-place update on its own slot row - no single hot row"""
+        slot = next(next_slot) % shards
+        conn = db_config.get_connection()
+        try:
+            cursor = conn.cursor()
+            for i in range(iterations):
+                t0 = time.perf_counter_ns()
+                cursor.execute(
+                    db_config.txn_prefix +
+                    "UPDATE user_counter_shards SET counter = counter + 1 WHERE user_id = 1 AND slot = %s",
+                    (slot,)
+                )
+                conn.commit()
+                if histogram is not None:
+                    histogram.record((time.perf_counter_ns() - t0) // 1000)
+        finally:
+            conn.close()
+
+    return sharded_worker
+
+
+# ============================================================
+# Test Runner
+# ============================================================
+
+def run_test(name: str, worker_func: Callable, db_config: DatabaseConfig,
+             num_threads: int = 10, iterations_per_thread: int = 10000,
+             reset_func: Callable = reset_counter, value_func: Callable = get_counter_value,
+             retry_policy: RetryPolicy = None, prepared: bool = False):
+    """
+    Run a concurrent test with specified worker function
+    (retry_policy is shared by all workers; prepared selects PREPARE/EXECUTE)
+    """
+
+    print(f"\n{'='*60}")
+    print(f"TEST: {name}")
+    print(f"{'='*60}")
+    print(f"Threads: {num_threads}")
+    print(f"Iterations per thread: {iterations_per_thread}")
+    print(f"Expected final count: {num_threads * iterations_per_thread}")
+    print(f"Statements: {'prepared' if prepared else 'text'}")
+    print(f"Durability: {db_config.durability} (per {db_config.durability_scope})")
+    print()
+
+    # Reset counter
+    reset_func(db_config)
+
+    # One histogram per worker thread, merged after the run
+    histograms = [LatencyHistogram() for _ in range(num_threads)]
+
+    # Run concurrent workers
+    start_time = time.perf_counter()
+
+    worker_kwargs = {'retry_policy': retry_policy} if retry_policy is not None else {}
+    if prepared:
+        worker_kwargs['prepared'] = True
+
+    with ThreadPoolExecutor(max_workers=num_threads) as executor:
+        futures = [
+            executor.submit(worker_func, db_config, iterations_per_thread, histograms[t], **worker_kwargs)
+            for t in range(num_threads)
+        ]
+
+        # Wait for all to complete
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f"Worker error: {e}")
+
+    end_time = time.perf_counter()
+    elapsed = end_time - start_time
+
+    # Get final counter value
+    final_value = value_func(db_config)
+    expected_value = num_threads * iterations_per_thread
+
+    # Calculate throughput
+    throughput = (num_threads * iterations_per_thread) / elapsed if elapsed > 0 else 0
+
+    # Results
+    print(f"Results:")
+    print(f"  Final counter value: {final_value}")
+    print(f"  Expected value: {expected_value}")
+    print(f"  Lost updates: {expected_value - final_value}")
+    print(f"  Elapsed time: {elapsed:.2f} seconds")
+    print(f"  Throughput: {throughput:.2f} updates/second")
+    if retry_policy is not None:
+        print(retry_policy.report())
+    latency = LatencyHistogram()
+    for h in histograms:
+        latency.merge(h)
+    print(latency.report("Latency"))
+    # Closed loop: back-fill increments a stalled worker never issued
+    interval = latency.percentile(50)
+    corrected = latency.corrected(interval)
+    print(corrected.report(f"Latency, CO-corrected (interval {interval / 1000:.2f} ms)"))
+
+    if final_value == expected_value:
+        print(f"  ✓ SUCCESS: No lost updates!")
+    else:
+        print(f"  ✗ FAILURE: Lost {expected_value - final_value} updates!")
+
+    return {
+        'name': name,
+        'final_value': final_value,
+        'expected_value': expected_value,
+        'lost_updates': expected_value - final_value,
+        'elapsed': elapsed,
+        'throughput': throughput,
+        'latency_us': latency.summary(),
+        'latency_corrected_us': corrected.summary(),
+        'retries': retry_policy.stats() if retry_policy is not None else None,
+        'prepared': prepared,
+        'durability': db_config.durability,
+        'success': final_value == expected_value
+    }
+
+
+VARIANTS = [
+    # (name, worker, retries on conflicts)
+    ("1. Lost Update (NOT thread-safe)", lost_update_worker, False),
+    ("2. Serializable Isolation Level", serializable_worker, True),
+    ("3. In-place Atomic Update", inplace_update_worker, False),
+    ("4. Row-level Locking (FOR UPDATE)", row_locking_worker, False),
+    ("5. Optimistic Concurrency Control", optimistic_locking_worker, True),
+]
+
+
+def main():
+    """Run all tests"""
+    parser = argparse.ArgumentParser(description="PostgreSQL counter implementation tests")
+    parser.add_argument("--backoff", choices=RETRY_MODES, default="exponential",
+                        help="Retry policy for the serializable and optimistic variants")
+    parser.add_argument("--statements", choices=["prepared", "text", "compare"], default="prepared",
+                        help="prepared: PREPARE/EXECUTE, text: plain SQL per call, compare: run every variant both ways")
+    parser.add_argument("--durability", choices=list(DURABILITY_LEVELS) + ["compare"], default="strict",
+                        help="synchronous_commit tier: strict (on), local, async (off), compare: run every tier")
+    parser.add_argument("--durability-scope", choices=DURABILITY_SCOPES, default="session",
+                        help="Apply the tier once per connection or with SET LOCAL in every transaction")
+    args = parser.parse_args()
+
+    tiers = list(DURABILITY_LEVELS) if args.durability == "compare" else [args.durability]
+
+    print("\n" + "="*60)
+    print("PostgreSQL Counter Implementation Tests")
+    print("="*60)
+
+    modes = [False, True] if args.statements == "compare" else [args.statements == "prepared"]
+    results = []
+
+    for tier in tiers:
+        # Database configuration
+        db_config = DatabaseConfig(
+            host="postgres",
+            port=5432,
+            database="counter_db",
+            user="postgres",
+            password="postgres",
+            durability=tier,
+            durability_scope=args.durability_scope
+        )
+        for name, worker, retries in VARIANTS:
+            for prepared in modes:
+                tags = [tier] if len(tiers) > 1 else []
+                if len(modes) > 1:
+                    tags.append('prepared' if prepared else 'text')
+                label = f"{name} [{', '.join(tags)}]" if tags else name
+                result = run_test(
+                    label,
+                    worker,
+                    db_config,
+                    retry_policy=RetryPolicy(args.backoff) if retries else None,
+                    prepared=prepared
+                )
+                result['variant'] = name
+                results.append(result)
+
+    # Summary
+    print("\n" + "="*60)
+    print("SUMMARY OF ALL TESTS")
+    print("="*60)
+    print(f"{'Test':<52} {'Result':<10} {'Time (s)':<12} {'Throughput (ops/s)':<20} {'p99 (ms)':<10}")
+    print("-"*60)
+
+    for r in results:
+        status = "✓ PASS" if r['success'] else "✗ FAIL"
+        print(f"{r['name']:<52} {status:<10} {r['elapsed']:<12.2f} {r['throughput']:<20.2f} "
+              f"{r['latency_us']['p99'] / 1000:<10.2f}")
+
+    if len(modes) > 1:
+        print("\nPrepared vs. text statements:")
+        for text, prep in zip(results[0::2], results[1::2]):
+            speedup = prep['throughput'] / text['throughput'] if text['throughput'] else 0
+            tier = f" [{text['durability']}]" if len(tiers) > 1 else ""
+            print(f"  {text['variant'] + tier:<50} {speedup:.2f}x throughput")
+
+    if len(tiers) > 1:
+        # Same variant and statement mode under strict vs. the relaxed tiers
+        print(f"\nThroughput per durability tier ({args.durability_scope} scope, ops/s):")
+        print(f"  {'Test':<50} " + " ".join(f"{t:<12}" for t in tiers) + " async/strict")
+        runs_per_tier = len(results) // len(tiers)
+        for i in range(runs_per_tier):
+            row = [results[k * runs_per_tier + i] for k in range(len(tiers))]
+            by_tier = {r['durability']: r['throughput'] for r in row}
+            label = row[0]['variant'] + (f" [{'prepared' if row[0]['prepared'] else 'text'}]" if len(modes) > 1 else "")
+            ratio = by_tier['async'] / by_tier['strict'] if by_tier['strict'] else 0
+            print(f"  {label:<50} " + " ".join(f"{by_tier[t]:<12.0f}" for t in tiers) + f" {ratio:.2f}x")
+
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
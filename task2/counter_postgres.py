@@ -1,98 +1,150 @@
-"""
-PostgreSQL counter for Web-counter application (Task 1 integration)
-Uses in-place update for thread-safety
-"""
-import psycopg2
-import os
-
-
-class PostgresCounter:
-    """
-    PostgreSQL-based counter using in-place atomic update.
-    Thread-safe and persistent.
-    """
-
-    def __init__(self, host="postgres", port=5432, database="counter_db",
-                 user="postgres", password="postgres", user_id=1):
-        self.host = host
-        self.port = port
-        self.database = database
-        self.user = user
-        self.password = password
-        self.user_id = user_id
-        self._init_db()
-
-    def _get_connection(self):
-        """Create a new database connection"""
-        return psycopg2.connect(
-            host=self.host,
-            port=self.port,
-            database=self.database,
-            user=self.user,
-            password=self.password
-        )
-
-    def _init_db(self):
-        """Initialize database table if needed"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-
-            # Create table if not exists
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS user_counter (
-                    user_id INTEGER PRIMARY KEY,
-                    counter INTEGER NOT NULL DEFAULT 0,
-                    version INTEGER NOT NULL DEFAULT 0
-                )
-            """)
-
-            # Insert user if not exists
-            cursor.execute("""
-                INSERT INTO user_counter (user_id, counter, version)
-                VALUES (%s, 0, 0)
-                ON CONFLICT (user_id) DO NOTHING
-            """, (self.user_id,))
-
-            conn.commit()
-        finally:
-            conn.close()
-
-    def increment(self) -> int:
-        """
-        Increment counter using atomic in-place update.
-        Returns new counter value.
-        """
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-
-            # Atomic increment and return new value
-            cursor.execute("""
-                UPDATE user_counter 
-                SET counter = counter + 1 
-                WHERE user_id = %s
-                RETURNING counter
-            """, (self.user_id,))
-
-            result = cursor.fetchone()
-            conn.commit()
-
-            return result[0] if result else 0
-        finally:
-            conn.close()
-
-    def get(self) -> int:
-        """Get current counter value"""
-        conn = self._get_connection()
-        try:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT counter FROM user_counter WHERE user_id = %s",
-                (self.user_id,)
-            )
-            result = cursor.fetchone()
-            return result[0] if result else 0
-        finally:
-            conn.close()
-
+"""
+PostgreSQL counter for Web-counter application (Task 1 integration)
+Uses in-place update for thread-safety; hot statements are prepared
+once per pooled connection
+"""
+import psycopg2
+import os
+
+from pg_pool import ConnectionPool, synchronous_commit_sql
+from group_commit import GroupCommitter
+
+ADD_SQL = "UPDATE user_counter SET counter = counter + $1 WHERE user_id = $2 RETURNING counter"
+GET_SQL = "SELECT counter FROM user_counter WHERE user_id = $1"
+
+
+class PostgresCounter:
+    """
+    PostgreSQL-based counter using in-place atomic update.
+    Thread-safe and persistent.
+    """
+
+    def __init__(self, host="postgres", port=5432, database="counter_db",
+                 user="postgres", password="postgres", user_id=1,
+                 pool_min=1, pool_max=10, group_commit=False,
+                 group_window_ms=2.0, group_max=64, prepared=True,
+                 durability="strict", durability_scope="session"):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.user_id = user_id
+        self.prepared = prepared
+        self.durability = durability
+        self.durability_scope = durability_scope
+        setting = synchronous_commit_sql(durability, durability_scope)
+        self._session_setup = setting if durability_scope == "session" else None
+        # Per-transaction tier rides along with the UPDATE (no extra round trip)
+        txn_prefix = setting + "; " if durability_scope == "transaction" else ""
+        db_config = dict(host=host, port=port, database=database, user=user, password=password)
+
+        # Table must exist before pooled connections PREPARE statements against it
+        self._init_db(db_config)
+        self.pool = ConnectionPool(
+            db_config,
+            min_size=pool_min,
+            max_size=pool_max,
+            on_connect=self._setup_connection
+        )
+
+        if prepared:
+            self._add_sql = txn_prefix + "EXECUTE counter_add(%s, %s)"
+            self._get_sql = "EXECUTE counter_get(%s)"
+        else:
+            self._add_sql = txn_prefix + ADD_SQL.replace("$1", "%s").replace("$2", "%s")
+            self._get_sql = GET_SQL.replace("$1", "%s")
+
+        # Optional group commit: concurrent increments share one UPDATE + commit
+        self._group = None
+        if group_commit:
+            self._group = GroupCommitter(
+                self._add, window=group_window_ms / 1000.0, max_batch=group_max
+            )
+
+    def _init_db(self, db_config):
+        """Initialize database table if needed"""
+        conn = psycopg2.connect(**db_config)
+        try:
+            cursor = conn.cursor()
+
+            # Create table if not exists
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS user_counter (
+                    user_id INTEGER PRIMARY KEY,
+                    counter INTEGER NOT NULL DEFAULT 0,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+            # Insert user if not exists
+            cursor.execute("""
+                INSERT INTO user_counter (user_id, counter, version)
+                VALUES (%s, 0, 0)
+                ON CONFLICT (user_id) DO NOTHING
+            """, (self.user_id,))
+
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _setup_connection(self, conn):
+        """
+        Pool on_connect hook: apply the session durability tier and parse and
+        plan the hot statements once per connection
+        """
+        cursor = conn.cursor()
+        if self._session_setup is not None:
+            cursor.execute(self._session_setup)
+        if self.prepared:
+            cursor.execute(f"PREPARE counter_add(integer, integer) AS {ADD_SQL}")
+            cursor.execute(f"PREPARE counter_get(integer) AS {GET_SQL}")
+        conn.commit()
+
+    def increment(self) -> int:
+        """
+        Increment counter using atomic in-place update.
+        Returns new counter value.
+        """
+        if self._group is not None:
+            return self._group.submit(1)
+        return self._add(1)
+
+    def _add(self, amount: int) -> int:
+        """Add amount in one transaction and return the new value"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+
+            # Atomic increment and return new value
+            cursor.execute(self._add_sql, (amount, self.user_id))
+
+            result = cursor.fetchone()
+            conn.commit()
+
+            return result[0] if result else 0
+
+    def get(self) -> int:
+        """Get current counter value"""
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self._get_sql, (self.user_id,))
+            result = cursor.fetchone()
+            conn.commit()
+            return result[0] if result else 0
+
+    def stats(self) -> dict:
+        """Connection pool and group commit metrics"""
+        stats = {
+            'pool': self.pool.stats(),
+            'durability': {'level': self.durability, 'scope': self.durability_scope},
+        }
+        if self._group is not None:
+            stats['group_commit'] = self._group.stats()
+        return stats
+
+    def close(self):
+        """Flush pending group commits and close pooled connections"""
+        if self._group is not None:
+            self._group.close()
+        self.pool.close()
+
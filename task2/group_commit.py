@@ -0,0 +1,129 @@
+"""
+Group commit for counter increments.
+
+Concurrent increment() callers that arrive within a short window are
+coalesced into a single ``UPDATE ... SET value = value + k RETURNING value``
+(one transaction, one WAL flush). Each caller still gets its own distinct
+post-increment value carved out of the returned range.
+
+Canonical copy: task1/server/group_commit.py. Each task directory is its
+own Docker build context, so task2/group_commit.py is a byte-for-byte
+copy: edit the canonical file and copy it over.
+"""
+import threading
+import time
+from typing import Callable
+
+
+class _Pending:
+    """One caller waiting for its share of a batch."""
+    __slots__ = ('amount', 'event', 'value', 'error')
+
+    def __init__(self, amount: int):
+        self.amount = amount
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class GroupCommitter:
+    """
+    Coalesces concurrent increments into one backend call.
+
+    Args:
+        apply: Function that atomically adds ``k`` and returns the new value
+        window: Seconds to wait for more callers after the first one arrives
+        max_batch: Flush immediately once this many callers are queued
+    """
+
+    def __init__(self, apply: Callable[[int], int], window: float = 0.002,
+                 max_batch: int = 64):
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+
+        self._apply = apply
+        self.window = window
+        self.max_batch = max_batch
+
+        self._cond = threading.Condition()
+        self._queue = []
+        self._closed = False
+
+        # Metrics
+        self.batches = 0
+        self.batched_calls = 0
+
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, amount: int = 1) -> int:
+        """Queue an increment and block until its batch is committed."""
+        pending = _Pending(amount)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("GroupCommitter is closed")
+            self._queue.append(pending)
+            if len(self._queue) == 1 or len(self._queue) >= self.max_batch:
+                self._cond.notify()
+
+        pending.event.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.value
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._queue:
+                    return
+
+                # Give other callers a chance to join the batch
+                deadline = time.monotonic() + self.window
+                while len(self._queue) < self.max_batch and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        total = sum(p.amount for p in batch)
+        try:
+            last = self._apply(total)
+        except Exception as e:
+            # Nothing was committed - every caller in the batch fails
+            for p in batch:
+                p.error = e
+                p.event.set()
+            return
+
+        # Hand out the committed range [last - total + 1, last] in arrival order
+        value = last - total
+        for p in batch:
+            value += p.amount
+            p.value = value
+            p.event.set()
+
+        self.batches += 1
+        self.batched_calls += len(batch)
+
+    def stats(self) -> dict:
+        """Batching efficiency metrics."""
+        return {
+            'batches': self.batches,
+            'calls': self.batched_calls,
+            'avg_batch_size': self.batched_calls / self.batches if self.batches else 0.0,
+        }
+
+    def close(self):
+        """Flush queued callers and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
@@ -1,16 +1,26 @@
--- Initialize user_counter table
-DROP TABLE IF EXISTS user_counter;
-
-CREATE TABLE user_counter (
-    user_id INTEGER PRIMARY KEY,
-    counter INTEGER NOT NULL DEFAULT 0,
-    version INTEGER NOT NULL DEFAULT 0
-);
-
--- Insert initial record for user_id = 1
-INSERT INTO user_counter (user_id, counter, version)
-VALUES (1, 0, 0);
-
--- Verify
-SELECT * FROM user_counter;
-
+-- Initialize user_counter table
+DROP TABLE IF EXISTS user_counter;
+
+CREATE TABLE user_counter (
+    user_id INTEGER PRIMARY KEY,
+    counter INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+-- Insert initial record for user_id = 1
+INSERT INTO user_counter (user_id, counter, version)
+VALUES (1, 0, 0);
+
+-- Verify
+SELECT * FROM user_counter;
+
+
+-- Sharded (striped) counter: N slot rows per user, value = SUM(counter)
+DROP TABLE IF EXISTS user_counter_shards;
+
+CREATE TABLE user_counter_shards (
+    user_id INTEGER NOT NULL,
+    slot INTEGER NOT NULL,
+    counter BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, slot)
+);
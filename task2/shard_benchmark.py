@@ -0,0 +1,68 @@
+"""
+Sharded counter benchmark: throughput of in-place increments vs. number of slot rows.
+
+With a single row every writer queues on the same row lock; spreading the
+writers over N slot rows removes that hot spot until N >= number of threads.
+"""
+import argparse
+import os
+from functools import partial
+
+from counter_implementations import (
+    DatabaseConfig,
+    run_test,
+    make_sharded_worker,
+    reset_sharded_counter,
+    get_sharded_counter_value,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded counter throughput vs. shard count")
+    parser.add_argument("--shards", default="1,2,4,8,16", help="Comma-separated shard counts")
+    parser.add_argument("--threads", type=int, default=10, help="Concurrent worker threads")
+    parser.add_argument("--iterations", type=int, default=2000, help="Increments per thread")
+    args = parser.parse_args()
+
+    db_config = DatabaseConfig(
+        host=os.getenv("POSTGRES_HOST", "postgres"),
+        port=int(os.getenv("POSTGRES_PORT", 5432)),
+        database=os.getenv("POSTGRES_DB", "counter_db"),
+        user=os.getenv("POSTGRES_USER", "postgres"),
+        password=os.getenv("POSTGRES_PASSWORD", "postgres")
+    )
+
+    print("\n" + "="*60)
+    print("Sharded Counter Benchmark")
+    print("="*60)
+
+    results = []
+    for shards in [int(s) for s in args.shards.split(",")]:
+        result = run_test(
+            f"Sharded in-place update ({shards} slots)",
+            make_sharded_worker(shards),
+            db_config,
+            num_threads=args.threads,
+            iterations_per_thread=args.iterations,
+            reset_func=partial(reset_sharded_counter, shards=shards),
+            value_func=get_sharded_counter_value
+        )
+        result['shards'] = shards
+        results.append(result)
+
+    # Summary
+    baseline = results[0]['throughput'] if results else 0
+    print("\n" + "="*60)
+    print("SHARD SCALING SUMMARY")
+    print("="*60)
+    print(f"{'Shards':<10} {'Result':<10} {'Time (s)':<12} {'Throughput (ops/s)':<20} {'Speedup':<10}")
+    print("-"*60)
+    for r in results:
+        status = "✓ PASS" if r['success'] else "✗ FAIL"
+        speedup = r['throughput'] / baseline if baseline else 0
+        print(f"{r['shards']:<10} {status:<10} {r['elapsed']:<12.2f} {r['throughput']:<20.2f} {speedup:<10.2f}")
+    print("="*60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+package counter;
+
+import com.hazelcast.nio.serialization.DataSerializableFactory;
+import com.hazelcast.nio.serialization.IdentifiedDataSerializable;
+
+/**
+ * Registered in hazelcast-config.yaml; ids must match entry_processor.py.
+ */
+public class CounterSerializableFactory implements DataSerializableFactory {
+
+    public static final int FACTORY_ID = 1001;
+    public static final int INCREMENT_ENTRY_PROCESSOR = 1;
+
+    @Override
+    public IdentifiedDataSerializable create(int typeId) {
+        if (typeId == INCREMENT_ENTRY_PROCESSOR) {
+            return new IncrementEntryProcessor();
+        }
+        return null;
+    }
+}
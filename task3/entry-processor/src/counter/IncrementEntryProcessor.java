@@ -0,0 +1,58 @@
+package counter;
+
+import com.hazelcast.map.EntryProcessor;
+import com.hazelcast.nio.ObjectDataInput;
+import com.hazelcast.nio.ObjectDataOutput;
+import com.hazelcast.nio.serialization.IdentifiedDataSerializable;
+
+import java.io.IOException;
+import java.util.Map;
+
+/**
+ * Adds a delta to a numeric map value on the partition owner and returns the new value.
+ * The Python client seeds values as Integer (its default int type); the result
+ * is stored as a Long.
+ * The read-modify-write runs inside the partition thread, so one round trip
+ * replaces lock/get/put/unlock or a get + replaceIfSame retry loop.
+ * Backups replay the same processor.
+ */
+public class IncrementEntryProcessor
+        implements EntryProcessor<Object, Object, Long>, IdentifiedDataSerializable {
+
+    private long delta;
+
+    public IncrementEntryProcessor() {
+    }
+
+    public IncrementEntryProcessor(long delta) {
+        this.delta = delta;
+    }
+
+    @Override
+    public Long process(Map.Entry<Object, Object> entry) {
+        Object current = entry.getValue();
+        long next = (current == null ? 0L : ((Number) current).longValue()) + delta;
+        entry.setValue(next);
+        return next;
+    }
+
+    @Override
+    public int getFactoryId() {
+        return CounterSerializableFactory.FACTORY_ID;
+    }
+
+    @Override
+    public int getClassId() {
+        return CounterSerializableFactory.INCREMENT_ENTRY_PROCESSOR;
+    }
+
+    @Override
+    public void writeData(ObjectDataOutput out) throws IOException {
+        out.writeLong(delta);
+    }
+
+    @Override
+    public void readData(ObjectDataInput in) throws IOException {
+        delta = in.readLong();
+    }
+}
@@ -0,0 +1,36 @@
+"""
+Python side of the server-side increment (entry-processor/ holds the Java class).
+
+The client only serializes the delta; the member deserializes the Java
+IncrementEntryProcessor by (factory id, class id) and runs it on the
+partition owning the key.
+"""
+from hazelcast.serialization.api import IdentifiedDataSerializable
+
+FACTORY_ID = 1001
+INCREMENT_ENTRY_PROCESSOR = 1
+
+
+class IncrementEntryProcessor(IdentifiedDataSerializable):
+    """Adds `delta` to a map value in one round trip; returns the new value."""
+
+    def __init__(self, delta=1):
+        self.delta = delta
+
+    def write_data(self, object_data_output):
+        object_data_output.write_long(self.delta)
+
+    def read_data(self, object_data_input):
+        self.delta = object_data_input.read_long()
+
+    def get_factory_id(self):
+        return FACTORY_ID
+
+    def get_class_id(self):
+        return INCREMENT_ENTRY_PROCESSOR
+
+
+# Passed to HazelcastClient(data_serializable_factories=...)
+DATA_SERIALIZABLE_FACTORIES = {
+    FACTORY_ID: {INCREMENT_ENTRY_PROCESSOR: IncrementEntryProcessor},
+}
@@ -0,0 +1,553 @@
+"""
+Scripted fault injection for the Hazelcast counter strategies.
+
+failure_test.py asks the operator to `docker kill` a member by hand, so no
+two runs inject the fault at the same moment. This driver runs every
+strategy for a fixed duration from several threads and applies a fault
+schedule at exact offsets into each run through a pluggable controller:
+
+    docker - kill/start, pause/unpause and network disconnect/connect of
+             the docker-compose members (run on the host, next to docker)
+    fake   - in-process stand-in cluster with leader election, partition
+             failover and CRDT replication delays, for CI and dry runs
+
+For each strategy it reports throughput over time, the recovery time of
+each fault (first successful increment started after the fault) and the
+longest stall, and checks the final value against acknowledged increments.
+
+Usage:
+    python fault_injection.py --cluster fake --faults 3:kill:leader --duration 10
+    python fault_injection.py --cluster docker --faults 5:kill:hazelcast-node2,15:start:hazelcast-node2
+    python fault_injection.py --cluster docker --strategies iatomic,crdt \\
+        --faults 5:pause:hazelcast-node1,12:unpause:hazelcast-node1
+"""
+import argparse
+import json
+import math
+import subprocess
+import threading
+import time
+
+ACTIONS = ("kill", "start", "pause", "unpause", "disconnect", "connect")
+# Action that undoes each fault when the cluster is healed between strategies
+UNDO = {"kill": "start", "pause": "unpause", "disconnect": "connect"}
+# Fake cluster member aliases: CP group leader and the counter key's partition owner
+ALIASES = {"leader": "cp", "owner": "map"}
+
+
+def parse_faults(spec: str) -> list:
+    """'5:kill:hazelcast-node2,15:start:hazelcast-node2' -> [(5.0, 'kill', 'hazelcast-node2'), ...]"""
+    faults = []
+    for item in filter(None, spec.split(",")):
+        offset, action, member = item.split(":", 2)
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown fault action {action!r}, expected one of {ACTIONS}")
+        faults.append((float(offset), action, member))
+    return sorted(faults)
+
+
+# ============================================================
+# Controllers
+# ============================================================
+
+class ClusterController:
+    """
+    Applies fault actions to cluster members and remembers which faults
+    are still active, so heal() can undo them before the next strategy.
+    """
+
+    settle_s = 0.0      # wait after healing until the cluster is usable again
+
+    def __init__(self):
+        self._active = {}   # member -> undo action
+        self._aliased = {}  # (alias, undo action) -> member the aliased fault hit
+
+    def apply(self, action: str, member: str) -> str:
+        """
+        Run one action; returns the member it was applied to.
+
+        An alias is resolved when the fault fires; the matching undo
+        ('1:kill:leader,4:start:leader') goes to the member that fault hit,
+        not to whoever holds the role after failover. Undoing a member
+        without an active fault of that kind raises ValueError.
+        """
+        alias = member
+        if action not in UNDO and (alias, action) in self._aliased:
+            member = self._aliased.pop((alias, action))
+        else:
+            member = self.resolve(member)
+        if action not in UNDO and self._active.get(member) != action:
+            raise ValueError(f"{action} {member}: no active fault on that member to undo")
+        getattr(self, action)(member)
+        if action in UNDO:
+            self._active[member] = UNDO[action]
+            if alias in ALIASES:
+                self._aliased[alias, UNDO[action]] = member
+        else:
+            del self._active[member]
+        return member
+
+    def resolve(self, member: str) -> str:
+        """Map aliases such as 'leader' or 'owner' to a member name."""
+        return member
+
+    def heal(self):
+        """Undo every fault that is still active."""
+        healed = bool(self._active)
+        for member, undo in list(self._active.items()):
+            getattr(self, undo)(member)
+        self._active.clear()
+        self._aliased.clear()
+        if healed and self.settle_s:
+            time.sleep(self.settle_s)
+
+
+class DockerController(ClusterController):
+    """Faults on docker-compose containers through the docker CLI."""
+
+    def __init__(self, network: str, settle_s: float = 15.0):
+        super().__init__()
+        self.network = network
+        self.settle_s = settle_s
+        self._addresses = {}
+
+    def _docker(self, *args) -> str:
+        result = subprocess.run(["docker", *args], check=True, capture_output=True, text=True)
+        return result.stdout.strip()
+
+    def resolve(self, member: str) -> str:
+        if member in ALIASES:
+            raise ValueError(f"docker controller needs a container name instead of {member!r}; find the "
+                             "CP leader with docker logs hazelcast-node1 2>&1 | grep LEADER")
+        return member
+
+    def kill(self, member):
+        self._docker("kill", member)
+
+    def start(self, member):
+        self._docker("start", member)
+
+    def pause(self, member):
+        self._docker("pause", member)
+
+    def unpause(self, member):
+        self._docker("unpause", member)
+
+    def disconnect(self, member):
+        # Members have static addresses in docker-compose.yml; reconnect with the same one
+        self._addresses[member] = self._docker(
+            "inspect", "-f", f'{{{{(index .NetworkSettings.Networks "{self.network}").IPAddress}}}}', member)
+        self._docker("network", "disconnect", self.network, member)
+
+    def connect(self, member):
+        ip = self._addresses.pop(member, None)
+        self._docker("network", "connect", *(["--ip", ip] if ip else []), self.network, member)
+
+
+class FakeCluster(ClusterController):
+    """
+    In-process stand-in for the three-member cluster.
+
+    Models what the client sees, not Hazelcast internals:
+        cp   - IAtomicLong calls go to the Raft leader and need a majority;
+               a new leader is elected election_s after the leader fails
+        map  - IMap calls go to the partition owner; the backup takes over
+               detection_s after the owner fails, with the value intact
+        crdt - PN-counter increments go to any live replica; each replica's
+               increments reach the others every replication_s, and a
+               killed replica loses what it had not replicated yet
+    Calls to a failed target block (like the client's invocation retries)
+    until failover, or raise TimeoutError after call_timeout_s. Killed and
+    disconnected members behave the same here; a paused member keeps its
+    role until it is detected as failed. restore() puts every member and
+    role back to the initial layout, so each strategy sees the same faults.
+    """
+
+    def __init__(self, members=("hazelcast-node1", "hazelcast-node2", "hazelcast-node3"),
+                 detection_s: float = 1.0, election_s: float = 2.0, replication_s: float = 0.1,
+                 op_latency_s: float = 0.0002, call_timeout_s: float = 10.0):
+        super().__init__()
+        self.members = list(members)
+        self.detection_s = detection_s
+        self.election_s = election_s
+        self.replication_s = replication_s
+        self.op_latency_s = op_latency_s
+        self.call_timeout_s = call_timeout_s
+
+        self._cond = threading.Condition()
+        self.restore()
+
+    def restore(self):
+        """All members up, initial leader and partition owner, counters at zero."""
+        with self._cond:
+            self._active.clear()
+            self._aliased.clear()
+            self._state = {m: "up" for m in self.members}
+            self._failed_at = {}
+            self._role = {"cp": self.members[0], "map": self.members[1]}
+            self._values = {}
+            # CRDT: replicated total plus each replica's not yet replicated increments
+            self._crdt_total = 0
+            self._crdt_pending = {m: 0 for m in self.members}
+            self._crdt_flushed = time.monotonic()
+            self._cond.notify_all()
+
+    # ---- controller actions ---------------------------------------------
+
+    def resolve(self, member: str) -> str:
+        if member in ALIASES:
+            with self._cond:
+                return self._role[ALIASES[member]]
+        if member not in self._state:
+            raise ValueError(f"Unknown member {member!r}, expected one of {self.members}")
+        return member
+
+    def _set(self, member, state):
+        with self._cond:
+            if state == "killed":
+                self._crdt_pending[member] = 0
+            self._state[member] = state
+            if state == "up":
+                self._failed_at.pop(member, None)
+            else:
+                self._failed_at.setdefault(member, time.monotonic())
+            self._cond.notify_all()
+
+    def kill(self, member):
+        self._set(member, "killed")
+
+    def start(self, member):
+        self._set(member, "up")
+
+    def pause(self, member):
+        self._set(member, "paused")
+
+    def unpause(self, member):
+        self._set(member, "up")
+
+    def disconnect(self, member):
+        self._set(member, "disconnected")
+
+    def connect(self, member):
+        self._set(member, "up")
+
+    # ---- client side ----------------------------------------------------
+
+    def _live(self):
+        return [m for m in self.members if self._state[m] == "up"]
+
+    def _target(self, kind: str, now: float):
+        """Member serving `kind` right now, failing over if due; None = must wait."""
+        live = self._live()
+        if kind == "crdt":
+            return live[0] if live else None
+        current = self._role[kind]
+        if self._state[current] == "up":
+            return current
+        delay = self.election_s if kind == "cp" else self.detection_s
+        if now - self._failed_at[current] < delay:
+            return None
+        if kind == "cp" and len(live) <= len(self.members) // 2:
+            return None     # no majority, no leader
+        if not live:
+            return None
+        self._role[kind] = live[0]
+        return live[0]
+
+    def call(self, kind: str, key: str, delta: int = 0, round_trips: int = 1) -> int:
+        """Add delta to key (0 = read) through the member serving `kind`."""
+        deadline = time.monotonic() + self.call_timeout_s
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                target = self._target(kind, now)
+                if target is not None:
+                    break
+                if now >= deadline:
+                    raise TimeoutError(f"{kind} call on {key!r} timed out")
+                self._cond.wait(min(0.05, deadline - now))
+            if kind == "crdt":
+                if now - self._crdt_flushed >= self.replication_s:
+                    self._crdt_total += sum(self._crdt_pending.values())
+                    self._crdt_pending = dict.fromkeys(self._crdt_pending, 0)
+                    self._crdt_flushed = now
+                self._crdt_pending[target] += delta
+                value = self._crdt_total + sum(self._crdt_pending.values())
+            else:
+                value = self._values[key] = self._values.get(key, 0) + delta
+        time.sleep(self.op_latency_s * round_trips)
+        return value
+
+
+# ============================================================
+# Strategies: each setup returns (increment, read_final_value)
+# ============================================================
+
+def hazelcast_strategies(client) -> dict:
+    from hazelcast.errors import ConsistencyLostError
+    from entry_processor import IncrementEntryProcessor
+
+    def iatomic():
+        counter = client.cp_subsystem.get_atomic_long("counter-fault-iatomic").blocking()
+        counter.set(0)
+        return counter.increment_and_get, counter.get
+
+    def cas():
+        counter_map = client.get_map("counter-fault-cas").blocking()
+        counter_map.put("counter", 0)
+
+        def increment():
+            while True:
+                current = counter_map.get("counter") or 0
+                if counter_map.replace_if_same("counter", current, current + 1):
+                    return
+        return increment, lambda: counter_map.get("counter")
+
+    def pessimistic():
+        counter_map = client.get_map("counter-fault-pessimistic").blocking()
+        counter_map.put("counter", 0)
+
+        def increment():
+            counter_map.lock("counter")
+            try:
+                counter_map.put("counter", (counter_map.get("counter") or 0) + 1)
+            finally:
+                counter_map.unlock("counter")
+        return increment, lambda: counter_map.get("counter")
+
+    def entry():
+        counter_map = client.get_map("counter-fault-entry-processor").blocking()
+        counter_map.put("counter", 0)
+        processor = IncrementEntryProcessor(1)
+        return lambda: counter_map.execute_on_key("counter", processor), lambda: counter_map.get("counter")
+
+    def crdt():
+        pn_counter = client.get_pn_counter("counter-crdt-fault").blocking()
+
+        def call(method):
+            try:
+                return method()
+            except ConsistencyLostError:
+                pn_counter.reset()
+                return method()
+
+        # PN counters cannot be set; count from the current value
+        start = call(pn_counter.get)
+        return lambda: call(pn_counter.increment_and_get), lambda: call(pn_counter.get) - start
+
+    return {"iatomic": iatomic, "cas": cas, "pessimistic": pessimistic, "entry": entry, "crdt": crdt}
+
+
+def fake_strategies(cluster: FakeCluster) -> dict:
+    def make(kind, key, round_trips):
+        def setup():
+            cluster.restore()
+            return (lambda: cluster.call(kind, key, 1, round_trips),
+                    lambda: cluster.call(kind, key, 0))
+        return setup
+
+    return {
+        "iatomic": make("cp", "iatomic", 1),
+        "cas": make("map", "cas", 2),
+        "pessimistic": make("map", "pessimistic", 4),
+        "entry": make("map", "entry", 1),
+        "crdt": make("crdt", "crdt", 1),
+    }
+
+
+# ============================================================
+# Runner
+# ============================================================
+
+def run_strategy(name, setup, controller, faults, duration, num_threads, settle_s):
+    """Increment from num_threads threads for `duration` s while the faults fire."""
+    controller.heal()
+    increment, read = setup()
+
+    successes = [[] for _ in range(num_threads)]     # (start, end) offsets per thread
+    errors = [0]
+    first_errors = []
+    errors_lock = threading.Lock()
+    stop = threading.Event()
+    applied = []
+    t0 = time.monotonic()
+
+    def worker(done):
+        while not stop.is_set():
+            start = time.monotonic()
+            try:
+                increment()
+            except Exception as e:
+                with errors_lock:
+                    errors[0] += 1
+                    if len(first_errors) < 5:
+                        first_errors.append(f"{time.monotonic() - t0:.2f}s: {e}")
+                continue
+            done.append((start - t0, time.monotonic() - t0))
+
+    def injector():
+        for offset, action, member in faults:
+            if stop.wait(max(0.0, t0 + offset - time.monotonic())):
+                return
+            at = time.monotonic() - t0
+            try:
+                target = controller.apply(action, member)
+                applied.append((at, action, target, None))
+                print(f"  [{at:6.2f}s] {action} {target}")
+            except Exception as e:
+                applied.append((at, action, member, str(e)))
+                print(f"  [{at:6.2f}s] {action} {member} FAILED: {e}")
+
+    threads = [threading.Thread(target=worker, args=(done,), daemon=True) for done in successes]
+    fault_thread = threading.Thread(target=injector, daemon=True)
+    for t in threads:
+        t.start()
+    fault_thread.start()
+    stop.wait(duration)
+    stop.set()
+    fault_thread.join()
+    for t in threads:
+        t.join(timeout=30)
+    stuck = sum(t.is_alive() for t in threads)
+
+    controller.heal()
+    # Let replicas converge before reading (matters for the CRDT)
+    time.sleep(settle_s)
+    try:
+        final_value = read()
+    except Exception as e:
+        final_value = None
+        first_errors.append(f"final read: {e}")
+
+    ops = sorted(op for done in successes for op in done)
+    return summarize(name, ops, applied, duration, errors[0], first_errors, stuck, final_value)
+
+
+def summarize(name, ops, applied, duration, errors, first_errors, stuck, final_value, bucket_s=1.0):
+    """Throughput timeline, per-fault recovery and final value check."""
+    buckets = [0] * math.ceil(duration / bucket_s)
+    ends = sorted(end for _, end in ops)
+    for end in ends:
+        if end < len(buckets) * bucket_s:
+            buckets[int(end / bucket_s)] += 1
+
+    recoveries = []
+    for i, (at, action, member, failure) in enumerate(applied):
+        if failure is not None:
+            continue
+        # Time to first successful increment that was issued after the fault
+        after = [end for start, end in ops if start >= at]
+        recovery = min(after) - at if after else None
+        # Longest gap between completions from the fault to the next action (or
+        # the end of the run), so a later fault's stall is not attributed here
+        until = applied[i + 1][0] if i + 1 < len(applied) else duration
+        window = [at] + [end for end in ends if at <= end <= until] + [until]
+        stall = max(b - a for a, b in zip(window, window[1:]))
+        recoveries.append({"at_s": round(at, 3), "action": action, "member": member,
+                           "recovery_s": round(recovery, 3) if recovery is not None else None,
+                           "max_stall_s": round(stall, 3)})
+
+    return {
+        "strategy": name,
+        "acknowledged": len(ops),
+        "final_value": final_value,
+        "correct": final_value == len(ops),
+        "throughput": round(len(ops) / duration, 2),
+        "errors": errors,
+        "first_errors": first_errors,
+        "stuck_threads": stuck,
+        "timeline": [round(count / bucket_s, 2) for count in buckets],
+        "bucket_s": bucket_s,
+        "faults": recoveries,
+    }
+
+
+def print_result(r):
+    print(f"Acknowledged: {r['acknowledged']:,}   Final value: "
+          f"{r['final_value'] if r['final_value'] is None else format(r['final_value'], ',')}   "
+          f"Correct: {'✓' if r['correct'] else '✗'}")
+    print(f"Throughput:   {r['throughput']:.2f} ops/second   Errors: {r['errors']:,}"
+          + (f"   Threads still blocked: {r['stuck_threads']}" if r['stuck_threads'] else ""))
+    for error in r["first_errors"]:
+        print(f"  Error: {error}")
+    for f in r["faults"]:
+        recovery = f"after {f['recovery_s']:.3f}s" if f["recovery_s"] is not None else "never"
+        print(f"  {f['action']} {f['member']} at {f['at_s']:.2f}s: recovered {recovery}, "
+              f"longest stall {f['max_stall_s']:.3f}s")
+    peak = max(r["timeline"]) or 1
+    print("Throughput over time:")
+    for i, rate in enumerate(r["timeline"]):
+        print(f"  {i * r['bucket_s']:6.1f}s {rate:>10.0f} ops/s {'#' * int(40 * rate / peak)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hazelcast counter strategies under scripted faults")
+    parser.add_argument("--cluster", choices=["docker", "fake"], default="docker",
+                        help="docker: real members via the docker CLI, fake: in-process stand-in")
+    parser.add_argument("--strategies", default="iatomic,cas,pessimistic,entry,crdt",
+                        help="Comma-separated: iatomic,cas,pessimistic,entry,crdt")
+    parser.add_argument("--faults", default="5:kill:hazelcast-node2,15:start:hazelcast-node2",
+                        help="Comma-separated offset_s:action:member (actions: "
+                             f"{','.join(ACTIONS)}; fake cluster also accepts {' and '.join(ALIASES)})")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per strategy")
+    parser.add_argument("--threads", type=int, default=10, help="Incrementing threads")
+    parser.add_argument("--settle", type=float, default=None,
+                        help="Seconds to wait after healing before reading (default: 15 docker, 0.5 fake)")
+    parser.add_argument("--docker-network", default="task3_hazelcast-network",
+                        help="docker: compose network for disconnect/connect")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args()
+
+    faults = parse_faults(args.faults)
+    names = [s for s in args.strategies.split(",") if s]
+
+    print("="*80)
+    print(f"Fault Injection: {args.cluster} cluster, {args.duration:.0f}s per strategy, {args.threads} threads")
+    print("="*80)
+
+    client = None
+    if args.cluster == "docker":
+        from counter_test import create_hazelcast_client
+        settle = 15.0 if args.settle is None else args.settle
+        controller = DockerController(args.docker_network, settle_s=settle)
+        client = create_hazelcast_client()
+        strategies = hazelcast_strategies(client)
+    else:
+        settle = 0.5 if args.settle is None else args.settle
+        controller = FakeCluster()
+        strategies = fake_strategies(controller)
+
+    results = []
+    try:
+        for name in names:
+            print(f"\n{name}:")
+            result = run_strategy(name, strategies[name], controller, faults,
+                                  args.duration, args.threads, settle)
+            print_result(result)
+            results.append(result)
+    finally:
+        controller.heal()
+        if client is not None:
+            client.shutdown()
+
+    print("\n" + "="*80)
+    print("RECOVERY SUMMARY")
+    print("="*80)
+    print(f"{'Strategy':<14} {'Throughput':<12} {'Errors':<8} {'Recovery (s)':<16} {'Max stall (s)':<16} {'Correct':<8}")
+    print("-" * 80)
+    for r in results:
+        # First disruptive fault of the schedule (kill / pause / disconnect)
+        fault = next((f for f in r["faults"] if f["action"] in UNDO), None)
+        recovery = "-" if fault is None or fault["recovery_s"] is None else f"{fault['recovery_s']:.3f}"
+        stall = "-" if fault is None else f"{fault['max_stall_s']:.3f}"
+        print(f"{r['strategy']:<14} {r['throughput']:<12.0f} {r['errors']:<8} {recovery:<16} {stall:<16} "
+              f"{'✓' if r['correct'] else '✗':<8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"cluster": args.cluster, "faults": faults, "results": results}, f, indent=2)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Low-overhead latency histogram (HDR-style log-linear buckets).
+
+Values are integer microseconds. Buckets are preallocated in one array,
+so record() is a few integer operations and one array increment - no
+per-operation object allocation. Relative precision is better than 1/64
+(~1.6%) over the whole range.
+
+Canonical copy: task1/client/histogram.py. Each task directory is its
+own Docker build context, so task2/histogram.py and task3/histogram.py
+are byte-for-byte copies: edit the canonical file and copy it over.
+"""
+import math
+from array import array
+
+SUB_BITS = 7
+SUB_COUNT = 1 << SUB_BITS          # exact buckets for values < 128 us
+HALF_SUB = SUB_COUNT >> 1
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+def _bucket_count(max_value: int) -> int:
+    exponent = max(max_value.bit_length() - SUB_BITS, 0)
+    return exponent * HALF_SUB + SUB_COUNT
+
+
+class LatencyHistogram:
+    """
+    Histogram of latencies in microseconds.
+
+    Args:
+        max_value_us: Largest trackable value; larger values are clamped
+    """
+
+    def __init__(self, max_value_us: int = 3_600_000_000):
+        self.max_value = max_value_us
+        self.counts = array('q', bytes(8 * _bucket_count(max_value_us)))
+        self.total = 0
+        self.sum = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < SUB_COUNT:
+            return value
+        exponent = value.bit_length() - SUB_BITS
+        return (exponent << (SUB_BITS - 1)) + (value >> exponent)
+
+    @staticmethod
+    def _value_at(index: int) -> int:
+        """Highest value that maps to bucket `index`."""
+        if index < SUB_COUNT:
+            return index
+        exponent = (index >> (SUB_BITS - 1)) - 1
+        mantissa = index - (exponent << (SUB_BITS - 1))
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, value: int, count: int = 1):
+        """Record one latency (microseconds)."""
+        if value < 0:
+            value = 0
+        elif value > self.max_value:
+            value = self.max_value
+        self.counts[self._index(value)] += count
+        self.total += count
+        self.sum += value * count
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def record_corrected(self, value: int, expected_interval: int):
+        """
+        Record a latency and back-fill the samples a stalled closed-loop
+        client never issued (coordinated omission correction).
+        """
+        self.record(value)
+        if expected_interval <= 0:
+            return
+        missing = value - expected_interval
+        while missing >= expected_interval:
+            self.record(missing)
+            missing -= expected_interval
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add another histogram's samples (e.g. per-thread histograms)."""
+        if len(other.counts) > len(self.counts):
+            self.counts.extend(bytes(8 * (len(other.counts) - len(self.counts))))
+            self.max_value = other.max_value
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        return self
+
+    def corrected(self, expected_interval: int) -> "LatencyHistogram":
+        """Copy with coordinated omission correction applied after the fact."""
+        result = LatencyHistogram(self.max_value)
+        for i, c in enumerate(self.counts):
+            if not c:
+                continue
+            value = min(self._value_at(i), self.max)
+            result.record(value, c)
+            if expected_interval <= 0:
+                continue
+            missing = value - expected_interval
+            while missing >= expected_interval:
+                result.record(missing, c)
+                missing -= expected_interval
+        return result
+
+    def percentile(self, p: float) -> int:
+        """Value at percentile p (0-100), accurate to the bucket precision."""
+        if self.total == 0:
+            return 0
+        if p >= 100.0:
+            return self.max
+        target = max(1, math.ceil(p / 100.0 * self.total))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(self._value_at(i), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        result = {f"p{p:g}": self.percentile(p) for p in PERCENTILES}
+        result["max"] = self.max
+        result["mean"] = self.sum / self.total if self.total else 0.0
+        result["count"] = self.total
+        return result
+
+    def report(self, title: str = "Latency", indent: str = "  ") -> str:
+        """Human-readable percentile block in milliseconds."""
+        s = self.summary()
+        parts = [f"p{p:g}={s[f'p{p:g}'] / 1000:.2f}" for p in PERCENTILES]
+        return (f"{indent}{title} (ms, n={s['count']}): "
+                + " ".join(parts) + f" max={s['max'] / 1000:.2f} mean={s['mean'] / 1000:.2f}")
@@ -0,0 +1,211 @@
+"""
+Pipelined Hazelcast counter benchmark.
+
+The tests in counter_test.py call .blocking() proxies from 10 threads, so at
+most 10 operations are ever in flight and the numbers mostly measure client
+round trips. Here a single thread issues increments through the client's
+non-blocking API and keeps up to `window` futures outstanding; completions
+are handled in future callbacks. Sweeping the window shows how much the
+cluster itself can absorb.
+
+Usage:
+    python pipelined_test.py --windows 1,4,16,64,256 --operations 20000
+    python pipelined_test.py --strategies iatomic --windows 128
+"""
+import argparse
+import threading
+import time
+
+from counter_test import create_hazelcast_client
+from histogram import LatencyHistogram
+
+
+class Pipeline:
+    """
+    Bounded window of in-flight asynchronous operations.
+
+    Args:
+        window: Maximum operations outstanding at any time
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self._slots = threading.BoundedSemaphore(window)
+        self._idle = threading.Condition()
+        self._pending = 0
+        # Callbacks run on client threads; one short lock around the tallies
+        self._stats_lock = threading.Lock()
+        self.histogram = LatencyHistogram()
+        self.completed = 0
+        self.errors = 0
+        self.retries = 0
+        self.first_errors = []
+
+    def submit(self, start):
+        """
+        Start one operation once a window slot is free.
+
+        `start(done)` must issue the asynchronous call(s) and arrange for
+        `done(error, retries)` to be called exactly once when finished.
+        """
+        self._slots.acquire()
+        with self._idle:
+            self._pending += 1
+        t0 = time.perf_counter_ns()
+
+        def done(error=None, retries=0):
+            latency = (time.perf_counter_ns() - t0) // 1000
+            with self._stats_lock:
+                self.histogram.record(latency)
+                self.retries += retries
+                if error is None:
+                    self.completed += 1
+                else:
+                    self.errors += 1
+                    if len(self.first_errors) < 5:
+                        self.first_errors.append(error)
+            self._slots.release()
+            with self._idle:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._idle.notify_all()
+
+        try:
+            start(done)
+        except Exception as e:
+            done(e)
+
+    def drain(self):
+        """Wait until every submitted operation has completed."""
+        with self._idle:
+            while self._pending:
+                self._idle.wait()
+
+
+def _result(future):
+    """(value, error) of a completed future."""
+    try:
+        return future.result(), None
+    except Exception as e:
+        return None, e
+
+
+def iatomic_increment(atomic_counter):
+    """One increment_and_get() future per operation"""
+    def start(done):
+        atomic_counter.increment_and_get().add_done_callback(lambda f: done(_result(f)[1]))
+    return start
+
+
+def cas_increment(counter_map, key="counter"):
+    """get() then replace_if_same(), chained in callbacks and retried on conflict"""
+    def start(done):
+        attempts = [0]
+
+        def read():
+            counter_map.get(key).add_done_callback(on_read)
+
+        def on_read(future):
+            current, error = _result(future)
+            if error is not None:
+                done(error, attempts[0])
+                return
+            current = current or 0
+            counter_map.replace_if_same(key, current, current + 1).add_done_callback(on_replace)
+
+        def on_replace(future):
+            replaced, error = _result(future)
+            if error is not None:
+                done(error, attempts[0])
+            elif replaced:
+                done(None, attempts[0])
+            else:
+                attempts[0] += 1
+                read()
+
+        read()
+    return start
+
+
+def run_pipelined(start, operations: int, window: int) -> Pipeline:
+    """Issue `operations` operations with at most `window` in flight."""
+    pipeline = Pipeline(window)
+    for _ in range(operations):
+        pipeline.submit(start)
+    pipeline.drain()
+    return pipeline
+
+
+def benchmark_iatomic(client, operations, window):
+    atomic_counter = client.cp_subsystem.get_atomic_long("counter-pipelined")
+    atomic_counter.set(0).result()
+    start_time = time.time()
+    pipeline = run_pipelined(iatomic_increment(atomic_counter), operations, window)
+    elapsed = time.time() - start_time
+    return pipeline, elapsed, atomic_counter.get().result()
+
+
+def benchmark_cas(client, operations, window):
+    counter_map = client.get_map("counter-pipelined-cas")
+    counter_map.put("counter", 0).result()
+    start_time = time.time()
+    pipeline = run_pipelined(cas_increment(counter_map), operations, window)
+    elapsed = time.time() - start_time
+    return pipeline, elapsed, counter_map.get("counter").result()
+
+
+STRATEGIES = {
+    "iatomic": ("IAtomicLong increment_and_get", benchmark_iatomic),
+    "cas": ("IMap replace_if_same (CAS)", benchmark_cas),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hazelcast counter throughput vs. in-flight window size")
+    parser.add_argument("--strategies", default="iatomic,cas", help="Comma-separated: iatomic,cas")
+    parser.add_argument("--windows", default="1,4,16,64,256", help="Comma-separated in-flight window sizes")
+    parser.add_argument("--operations", type=int, default=20000, help="Increments per run")
+    args = parser.parse_args()
+
+    windows = [int(w) for w in args.windows.split(",") if w]
+    strategies = [s for s in args.strategies.split(",") if s]
+
+    print("="*80)
+    print("Pipelined Hazelcast Counter Benchmark")
+    print("="*80)
+
+    client = create_hazelcast_client()
+    print("✓ Connected to Hazelcast cluster")
+    results = []
+    try:
+        for strategy in strategies:
+            title, benchmark = STRATEGIES[strategy]
+            for window in windows:
+                print(f"\n{title}: window={window}, operations={args.operations}")
+                pipeline, elapsed, final_value = benchmark(client, args.operations, window)
+                throughput = pipeline.completed / elapsed if elapsed > 0 else 0
+                print(f"Got:        {final_value:,} (expected {args.operations:,})")
+                print(f"Time:       {elapsed:.2f} seconds")
+                print(f"Throughput: {throughput:.2f} ops/second")
+                print(f"Retries:    {pipeline.retries:,}   Errors: {pipeline.errors:,}")
+                for error in pipeline.first_errors:
+                    print(f"  Error: {error}")
+                print(pipeline.histogram.report("Latency", indent=""))
+                results.append((strategy, window, throughput, pipeline, final_value == args.operations))
+    finally:
+        client.shutdown()
+
+    print("\n" + "="*80)
+    print("THROUGHPUT VS WINDOW SIZE")
+    print("="*80)
+    print(f"{'Strategy':<10} {'Window':<8} {'Throughput (ops/s)':<20} {'p50 (ms)':<10} {'p99 (ms)':<10} "
+          f"{'Retries':<10} {'Correct':<8}")
+    print("-" * 80)
+    for strategy, window, throughput, pipeline, correct in results:
+        h = pipeline.histogram
+        print(f"{strategy:<10} {window:<8} {throughput:<20.2f} {h.percentile(50) / 1000:<10.2f} "
+              f"{h.percentile(99) / 1000:<10.2f} {pipeline.retries:<10} {'✓' if correct else '✗':<8}")
+
+
+if __name__ == "__main__":
+    main()
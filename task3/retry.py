@@ -0,0 +1,125 @@
+"""
+Retry policy for optimistic / serializable increment loops.
+
+Retrying a conflicting transaction immediately mostly collides again with
+the same writers. Backing off with exponential delays and full jitter
+spreads the retries out, so fewer round trips are wasted on aborts.
+
+Canonical copy: task2/retry.py. Each task directory is its own Docker
+build context, so task3/retry.py is a byte-for-byte copy: edit the
+canonical file and copy it over.
+"""
+import random
+import threading
+import time
+
+MODES = ("none", "exponential", "adaptive")
+
+
+class RetryExhausted(Exception):
+    """Raised when an operation still conflicts after max_attempts."""
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter and optional abort-rate adaptation.
+
+    Args:
+        mode: "none" retries immediately, "exponential" sleeps a random
+              time in [0, min(max_delay, base_delay * 2**retry)],
+              "adaptive" additionally scales the delay by the expected
+              number of attempts per commit, 1 / (1 - abort rate), using
+              a moving average of the observed abort rate
+        base_delay: Backoff ceiling for the first retry, in seconds
+        max_delay: Upper bound for a single backoff, in seconds
+        max_attempts: Give up with RetryExhausted after this many
+                      attempts (None = retry forever)
+    """
+
+    def __init__(self, mode: str = "exponential", base_delay: float = 0.0005,
+                 max_delay: float = 0.05, max_attempts: int = None):
+        if mode not in MODES:
+            raise ValueError(f"Unknown retry mode: {mode}")
+        self.mode = mode
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._abort_rate = 0.0      # moving average over recent attempts
+        self._commits = 0
+        self._aborts = 0
+        self._gave_up = 0
+        self._sleep_total = 0.0
+
+    def delay(self, retry: int) -> float:
+        """Backoff before retry number `retry` (1 = first retry)."""
+        if self.mode == "none":
+            return 0.0
+        ceiling = self.base_delay * (2 ** (retry - 1))
+        if self.mode == "adaptive":
+            ceiling /= max(1.0 - self._abort_rate, 1 / 32)
+        return random.uniform(0, min(self.max_delay, ceiling))
+
+    def _record(self, aborted: bool):
+        with self._lock:
+            if aborted:
+                self._aborts += 1
+            else:
+                self._commits += 1
+            self._abort_rate += 0.05 * ((1.0 if aborted else 0.0) - self._abort_rate)
+
+    def run(self, operation, retry_on: tuple = (), on_abort=None) -> int:
+        """
+        Call `operation` until it succeeds.
+
+        Args:
+            operation: Returns True when committed, False on a conflict
+            retry_on: Exception types that also count as a conflict
+            on_abort: Called after each conflict (e.g. ``conn.rollback``)
+
+        Returns:
+            Number of retries that were needed
+        """
+        retries = 0
+        while True:
+            try:
+                committed = operation()
+            except retry_on:
+                committed = False
+            if committed:
+                self._record(aborted=False)
+                return retries
+
+            self._record(aborted=True)
+            if on_abort is not None:
+                on_abort()
+            retries += 1
+            if self.max_attempts is not None and retries >= self.max_attempts:
+                with self._lock:
+                    self._gave_up += 1
+                raise RetryExhausted(f"Still conflicting after {retries} attempts")
+            pause = self.delay(retries)
+            if pause > 0:
+                time.sleep(pause)
+                with self._lock:
+                    self._sleep_total += pause
+
+    def stats(self) -> dict:
+        with self._lock:
+            attempts = self._commits + self._aborts
+            return {
+                'mode': self.mode,
+                'commits': self._commits,
+                'aborts': self._aborts,
+                'gave_up': self._gave_up,
+                'abort_ratio': self._aborts / attempts if attempts else 0.0,
+                'retries_per_commit': self._aborts / self._commits if self._commits else 0.0,
+                'backoff_total_s': self._sleep_total,
+            }
+
+    def report(self, indent: str = "  ") -> str:
+        s = self.stats()
+        return (f"{indent}Retries ({s['mode']} backoff): {s['aborts']:,} aborts for {s['commits']:,} commits "
+                f"({s['retries_per_commit']:.2f} retries/commit, {s['backoff_total_s']:.2f}s backing off"
+                + (f", {s['gave_up']} gave up" if s['gave_up'] else "") + ")")